@@ -0,0 +1,114 @@
+# batch_cli.py
+# Command-line batch mode: payroll for many workbooks (and every sheet in them) on a process pool.
+# Usage: python -m time_track_pro batch site_a.xlsx site_b.xlsx --days 31 --sundays 4 --holidays 1 --method 1
+# Requirements: numpy, openpyxl
+
+import argparse
+import csv
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import profiler
+from export_stream import write_xlsx
+from payroll_engine import compute_payroll_blocks
+from shift_analytics import SHIFT_COLUMNS
+from workbook_stream import iter_employee_blocks, sheet_names
+
+RESULT_COLUMNS = ["Source File", "Sheet", "Employee Name", "Total Monthly Hours", "Calculated Salary", *SHIFT_COLUMNS]
+
+_worker_details = {}  # employee master handed to each worker process once
+
+def _init_worker(employee_details, profiling=False):
+    global _worker_details
+    _worker_details = employee_details
+    if profiling:
+        profiler.enable()
+
+def _process_sheet(file_path, sheet, days_in_month, num_sundays, num_holidays, calc_method):
+    # returns the rows and, when profiling, this sheet's stage stats for the parent to merge
+    profiler.reset()
+    # the sheet is read while it is computed, so this stage is the whole task, workbook reading included
+    with profiler.stage("batch_sheet") as st:
+        results = compute_payroll_blocks(iter_employee_blocks(file_path, sheet), days_in_month, num_sundays,
+                                         num_holidays, calc_method, _worker_details)
+        st.add(rows=len(results))
+    source = os.path.basename(file_path)
+    rows = [{"Source File": source, "Sheet": sheet, **r} for r in results]
+    return rows, profiler.stats() if profiler.enabled else None
+
+def run_batch(file_paths, days_in_month, num_sundays, num_holidays, calc_method, employee_details, workers=None, skipped=None):
+    """
+    Computes payroll for every sheet of every workbook, one pool task per sheet.
+    Returns the merged result rows in input order (file, then sheet, then employee). A sheet that fails
+    contributes no rows; if skipped is a list, (path, sheet, error) is appended to it for each such sheet.
+    """
+    tasks = [(path, sheet) for path in file_paths for sheet in sheet_names(path)]
+    by_task = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(employee_details, profiler.enabled)) as pool:
+        futures = {
+            pool.submit(_process_sheet, path, sheet, days_in_month, num_sundays, num_holidays, calc_method): (path, sheet)
+            for path, sheet in tasks
+        }
+        for fut in as_completed(futures):
+            path, sheet = futures[fut]
+            try:
+                by_task[(path, sheet)], stage_stats = fut.result()
+                if stage_stats:
+                    profiler.merge(stage_stats)
+            except Exception as e:
+                print(f"Warning: skipped {path} [{sheet}]: {e}")
+                by_task[(path, sheet)] = []
+                if skipped is not None:
+                    skipped.append((path, sheet, str(e)))
+    return [row for task in tasks for row in by_task[task]]
+
+def write_results(results, out_path):
+    # rows are streamed to the file; results may be any iterable
+    if out_path.lower().endswith(".csv"):
+        with open(out_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        write_xlsx(results, out_path, RESULT_COLUMNS)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m time_track_pro")
+    sub = parser.add_subparsers(dest="command", required=True)
+    batch = sub.add_parser("batch", help="process many attendance workbooks in parallel")
+    batch.add_argument("files", nargs="+", help="workbooks (glob patterns are expanded)")
+    batch.add_argument("--days", type=int, required=True, help="total days in the month")
+    batch.add_argument("--sundays", type=int, required=True, help="number of Sundays in the month")
+    batch.add_argument("--holidays", type=int, required=True, help="number of company holidays")
+    batch.add_argument("--method", choices=("1", "2"), required=True,
+                       help="1 for In/Out Time, 2 for Total Working Hours")
+    batch.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    batch.add_argument("--output", default="batch_results.xlsx", help="merged results file (.xlsx or .csv)")
+    batch.add_argument("--keep-going", action="store_true",
+                       help="exit with status 0 even if some sheets could not be processed")
+    return parser
+
+def main(argv, employee_details):
+    args = build_parser().parse_args(argv)
+    files = []
+    for pattern in args.files:
+        # shells on Windows do not expand wildcards
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+    missing = [f for f in files if not os.path.exists(f)]
+    if missing:
+        print("Error: file(s) not found:", ", ".join(missing))
+        return 1
+    skipped = []
+    with profiler.stage("batch_payroll") as st:
+        results = run_batch(files, args.days, args.sundays, args.holidays, args.method, employee_details, args.workers, skipped)
+        st.add(rows=len(results))
+    with profiler.stage("write_results", rows=len(results)):
+        write_results(results, args.output)
+    print(f"Processed {len(results)} employees from {len(files)} workbook(s) -> {args.output}")
+    if skipped:
+        # the results file is written either way, but without those sheets' employees
+        print(f"Error: {len(skipped)} sheet(s) skipped, results are incomplete" +
+              ("" if args.keep_going else " (use --keep-going to exit with status 0)"))
+        return 0 if args.keep_going else 1
+    return 0
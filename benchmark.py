@@ -0,0 +1,111 @@
+# benchmark.py
+# Times every stage of the pipeline on synthetic workbooks (see sample_workbook) and writes the timings
+# to JSON, so runs from different versions can be compared.
+# Usage: python benchmark.py --sizes 100,1000,10000,50000 --output bench_results.json
+# Requirements: numpy, pandas, openpyxl, reportlab (PDF stage only)
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import export_stream
+import month_store
+from payroll_engine import compute_payroll_blocks
+from sample_workbook import make_workbook, sample_employee_details
+from workbook_stream import blocks_from_rows, iter_sheet_rows, patch_cells
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+EDITS = 20  # In/Out cells rewritten by the write-back stage
+PARAMS = (31, 4, 1)  # days in month, Sundays, holidays
+
+def _timed(stages, name, fn, repeat=1):
+    # runs fn repeat times, records the fastest wall time in seconds and returns the last result
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    stages[name] = round(best, 6)
+    return out
+
+def _edits(blocks, count=EDITS):
+    # {(row, col): value} for In Time cells spread over the sheet, as the navigator would produce
+    edits = {}
+    step = max(1, len(blocks) // count)
+    for b in blocks[::step][:count]:
+        row = b["labels"].get("in time")
+        if row is not None and b["dates"]:
+            edits[(b["start_row"] + row, min(b["dates"].values()))] = "08:00"
+    return edits
+
+def run_size(employees, workdir, days=31, blank=0.03, malformed=0.02, pdf=True, repeat=1):
+    """Benchmarks one workbook size; returns {stage: seconds} plus the employee count."""
+    stages = {}
+    path = os.path.join(workdir, f"attendance_{employees}.xlsx")
+    names = _timed(stages, "generate", lambda: make_workbook(path, employees, days, blank, malformed))
+    details = sample_employee_details(names)
+    # openpyxl read of every row, then block / navigation indexing of the rows already in memory
+    rows = _timed(stages, "parse", lambda: list(iter_sheet_rows(path)), repeat)
+    blocks = _timed(stages, "navigation_index", lambda: list(blocks_from_rows(rows)), repeat)
+    del rows
+    for method in ("1", "2"):
+        results = _timed(stages, f"payroll_method_{method}",
+                         lambda: compute_payroll_blocks(blocks, *PARAMS, method, details), repeat)
+    _timed(stages, "cache_build", lambda: month_store.save(path, blocks), repeat)
+    for method in ("1", "2"):
+        _timed(stages, f"cached_payroll_method_{method}",
+               lambda: month_store.open_month(path).payroll(*PARAMS, method, details), repeat)
+    edited = os.path.join(workdir, f"edited_{employees}.xlsx")
+    shutil.copyfile(path, edited)
+    _timed(stages, "edit_write_back", lambda: patch_cells(edited, _edits(blocks)))
+    _timed(stages, "export_xlsx", lambda: export_stream.write_xlsx(iter(results), os.path.join(workdir, "results.xlsx")), repeat)
+    if pdf:
+        _timed(stages, "export_pdf", lambda: export_stream.write_pdf(iter(results), os.path.join(workdir, "results.pdf")), repeat)
+    return {"employees": len(blocks), "stages": stages}
+
+def run(sizes=DEFAULT_SIZES, days=31, blank=0.03, malformed=0.02, pdf=True, repeat=1, workdir=None, progress=print):
+    own_dir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="timetrack-bench-")
+    try:
+        report = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "days": days, "blank": blank, "malformed": malformed, "repeat": repeat,
+            "sizes": {},
+        }
+        for n in sizes:
+            report["sizes"][str(n)] = run_size(n, workdir, days, blank, malformed, pdf, repeat)
+            if progress:
+                stages = report["sizes"][str(n)]["stages"]
+                progress(f"{n:>6} employees: " + ", ".join(f"{k} {v:.3f}s" for k, v in stages.items()))
+        return report
+    finally:
+        if own_dir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="benchmark parsing, payroll, write-back and export")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated employee counts")
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--blank", type=float, default=0.03)
+    parser.add_argument("--malformed", type=float, default=0.02)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage, fastest kept")
+    parser.add_argument("--no-pdf", action="store_true", help="skip the PDF export stage")
+    parser.add_argument("--workdir", default=None, help="keep generated files here instead of a temp folder")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = run(sizes, args.days, args.blank, args.malformed, not args.no_pdf, args.repeat, args.workdir)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
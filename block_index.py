@@ -0,0 +1,118 @@
+# block_index.py
+# One pass over a sheet's first column: where each employee block starts/ends and on which row
+# each data label (Date / In Time / Out Time / Total Working Hours) sits.
+# Requirements: none (standard library only)
+
+# Classic layout: every employee is 22 rows + 1 blank row, data starts at row index 2.
+# Blocks are located from their labels, so other block sizes work too; the stride is only
+# used for sheets without any "Date" label.
+CHUNK_SIZE = 23
+BLOCK_ROWS = 22
+START_ROW = 2
+LABELS = ("date", "in time", "out time", "total working hours")
+
+def normalize_label(v):
+    # same normalisation the GUI has always used (str().strip().lower()), with blanks/NaN as ""
+    if v is None or (isinstance(v, float) and v != v):
+        return ""
+    return str(v).strip().lower()
+
+def block_name(v, start_row):
+    # employee name typically in first cell of the block
+    label = "" if v is None or (isinstance(v, float) and v != v) else str(v).strip()
+    return label or f"Employee_{start_row}"
+
+class BlockIndexer:
+    """
+    Incremental indexer: feed(row, first_cell) once per sheet row, in order; it returns the blocks that
+    became complete as (start, end, offsets) with offsets[i] = row of LABELS[i] relative to start (-1 if absent).
+    A block is anchored on its "Date" row and starts at the first non-blank row after the blank separator
+    before it (or at the nearest unlabeled row above it), so the 22+1 stride is not assumed.
+    """
+
+    def __init__(self, start_row=START_ROW):
+        self.start_row = start_row
+        self.mode = None       # "labeled" or "stride", decided from the first CHUNK_SIZE rows
+        self.pending = []      # (row, label) not yet part of a closed block
+        self.open_start = None
+        self.last_date = None
+
+    @property
+    def first_pending_row(self):
+        # callers buffering whole rows can drop everything before this
+        return self.pending[0][0] if self.pending else None
+
+    def feed(self, row, first_cell):
+        if row < self.start_row:
+            return []
+        label = normalize_label(first_cell)
+        if self.mode is None:
+            self.pending.append((row, label))
+            return self._decide() if len(self.pending) >= CHUNK_SIZE else []
+        return self._step(row, label)
+
+    def finish(self):
+        closed = self._decide() if self.mode is None else []
+        if self.mode == "stride":
+            if self.pending:
+                closed.append(self._close(self.pending[0][0], self.pending[-1][0] + 1))
+        elif self.open_start is not None:
+            closed.append(self._close(self.open_start, self.pending[-1][0] + 1))
+        self.pending = []
+        self.open_start = None
+        return closed
+
+    def _decide(self):
+        # sheets without any "Date" label in their first block keep the legacy 22+1 stride
+        self.mode = "labeled" if any(l == "date" for _, l in self.pending) else "stride"
+        replay, self.pending = self.pending, []
+        closed = []
+        for r, l in replay:
+            closed.extend(self._step(r, l))
+        return closed
+
+    def _step(self, row, label):
+        self.pending.append((row, label))
+        if self.mode == "stride":
+            if (row - self.start_row) % CHUNK_SIZE == BLOCK_ROWS - 1:
+                return [self._close(self.pending[0][0], row + 1)]
+            if (row - self.start_row) % CHUNK_SIZE == BLOCK_ROWS:
+                self.pending = []  # blank separator row
+            return []
+        if label != "date":
+            return []
+        start = self._choose_start(row)
+        closed = []
+        if self.open_start is not None:
+            closed.append(self._close(self.open_start, start))
+        else:
+            self.pending = [(r, l) for r, l in self.pending if r >= start]
+        self.open_start = start
+        self.last_date = row
+        return closed
+
+    def _choose_start(self, date_row):
+        between = [(r, l) for r, l in self.pending if r < date_row and (self.last_date is None or r > self.last_date)]
+        blanks = [r for r, l in between if not l]
+        if blanks:
+            after = [(r, l) for r, l in between if r > blanks[-1] and l]
+            if after and after[0][1] not in LABELS:
+                return after[0][0]
+        for r, l in reversed(between):
+            if l and l not in LABELS:
+                return r
+        return date_row
+
+    def _close(self, start, end):
+        # rows [start, end) form the block, trailing blank rows trimmed; pending keeps rows >= end
+        rows = [(r, l) for r, l in self.pending if start <= r < end]
+        self.pending = [(r, l) for r, l in self.pending if r >= end]
+        nonblank = [r for r, l in rows if l]
+        stop = nonblank[-1] + 1 if nonblank else start + 1
+        offsets = [-1] * len(LABELS)
+        for r, l in rows:
+            if l in LABELS and offsets[LABELS.index(l)] < 0:
+                offsets[LABELS.index(l)] = r - start
+        if self.mode == "stride":
+            stop = end  # legacy layout keeps the full 22 rows
+        return start, stop, tuple(offsets)
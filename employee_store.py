@@ -0,0 +1,142 @@
+# employee_store.py
+# Employee master (hourly rate and shift per employee) in an embedded SQLite database.
+# EmployeeStore behaves like the old {name: {"Hourly Salary", "Shift Start", "Shift End"}} dict,
+# but every assignment is a single-row upsert committed atomically (WAL journal).
+
+import csv
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+
+FIELDS = ("Hourly Salary", "Shift Start", "Shift End")
+_COLUMNS = ("hourly_salary", "shift_start", "shift_end")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    name TEXT PRIMARY KEY,
+    hourly_salary REAL,
+    shift_start TEXT,
+    shift_end TEXT
+)
+"""
+
+class EmployeeStore(MutableMapping):
+    """
+    Mapping of employee name -> {"Hourly Salary": ..., "Shift Start": ..., "Shift End": ...}.
+    Lookups go through the primary-key index on name; the connection is shared between threads.
+    """
+
+    def __init__(self, db_path, csv_path=None):
+        self.db_path = db_path
+        self.csv_path = csv_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+        if csv_path:
+            self._migrate_csv(csv_path)
+
+    def __reduce__(self):
+        # worker processes reopen the database instead of pickling the connection
+        return (EmployeeStore, (self.db_path,))
+
+    def _migrate_csv(self, csv_path):
+        # one-time import of the legacy employee_details.csv; user_version records that it ran
+        with self._lock:
+            done = self._conn.execute("PRAGMA user_version").fetchone()[0] >= 1
+        if done:
+            return
+        rows = []
+        if os.path.exists(csv_path):
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                for rec in csv.DictReader(f):
+                    name = (rec.get("Employee Name") or "").strip()
+                    if name:
+                        rows.append(_to_row(name, rec))
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT, rows)
+            self._conn.execute("PRAGMA user_version = 1")
+
+    def __getitem__(self, name):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hourly_salary, shift_start, shift_end FROM employees WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return _to_record(row)
+
+    def __setitem__(self, name, record):
+        with self._lock, self._conn:
+            self._conn.execute(_UPSERT, _to_row(name, record))
+
+    def __delitem__(self, name):
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM employees WHERE name = ?", (name,))
+        if cur.rowcount == 0:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM employees WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self):
+        return iter([name for name, _ in self.items()])
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+
+    def items(self):
+        # whole table in one query, in insertion order like the old dict
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, hourly_salary, shift_start, shift_end FROM employees ORDER BY rowid"
+            ).fetchall()
+        return [(r[0], _to_record(r[1:])) for r in rows]
+
+    def hourly_rates(self, names):
+        """{name: hourly salary} for the given names, fetched in a single indexed query."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, hourly_salary FROM employees WHERE name IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(names)),),
+            ).fetchall()
+        return dict(rows)
+
+    def shifts(self, names):
+        """{name: (shift start, shift end)} for the given names, in one query like hourly_rates."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, shift_start, shift_end FROM employees WHERE name IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(names)),),
+            ).fetchall()
+        return {r[0]: (r[1], r[2]) for r in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_UPSERT = """
+INSERT INTO employees (name, hourly_salary, shift_start, shift_end) VALUES (?, ?, ?, ?)
+ON CONFLICT(name) DO UPDATE SET
+    hourly_salary = excluded.hourly_salary,
+    shift_start = excluded.shift_start,
+    shift_end = excluded.shift_end
+"""
+
+def _to_row(name, record):
+    salary = record.get("Hourly Salary")
+    try:
+        salary = float(salary)
+    except (TypeError, ValueError):
+        salary = None
+    return (name, salary, record.get("Shift Start") or "", record.get("Shift End") or "")
+
+def _to_record(row):
+    return dict(zip(FIELDS, row))
@@ -0,0 +1,205 @@
+# export_stream.py
+# Streaming export of payroll results: any iterable of result dicts in, files out, without building
+# the whole table in memory. xlsx via openpyxl write-only mode, PDF as paginated tables (one page of
+# rows held at a time), per-employee PDF payslips split across a process pool.
+# Requirements: openpyxl, reportlab (PDF only)
+
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import chain, islice
+
+import profiler
+
+ROWS_PER_PAGE = 40     # table rows per PDF page
+PAYSLIP_CHUNK = 250    # payslips written per pool task
+
+def _peek(rows):
+    # first row (for the column names) and an iterator that still yields it
+    rows = iter(rows)
+    first = next(rows, None)
+    return first, (rows if first is None else chain([first], rows))
+
+def _cell(v):
+    return f"{v:.2f}" if isinstance(v, float) else ("" if v is None else str(v))
+
+def write_xlsx(rows, save_path, columns=None, progress=None):
+    """Writes result dicts row by row through a write-only workbook; returns the number of rows."""
+    from openpyxl import Workbook
+    first, rows = _peek(rows)
+    columns = list(columns or (first.keys() if first else []))
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(columns)
+    n = 0
+    for n, r in enumerate(rows, 1):
+        ws.append([r.get(c) for c in columns])
+        if progress and n % 1000 == 0:
+            progress(n)
+    wb.save(save_path)
+    return n
+
+def _fit(text, font, size, width):
+    # text cut to at most width points, ending in an ellipsis when shortened
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    if stringWidth(text, font, size) <= width:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if stringWidth(text[:mid].rstrip() + "\u2026", font, size) <= width:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + "\u2026"
+
+def _wrap(text, font, size, width):
+    # greedy word wrap; a single word wider than width gets a line of its own
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    lines = []
+    for word in text.split():
+        if lines and stringWidth(lines[-1] + " " + word, font, size) <= width:
+            lines[-1] += " " + word
+        else:
+            lines.append(word)
+    return lines or [""]
+
+def _header_lines(columns, width, font="Helvetica-Bold", max_lines=2):
+    # column headers wrapped onto up to max_lines lines, in the largest size from 10 pt down to 7 pt that fits
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    for size in (10, 9, 8, 7):
+        wrapped = [_wrap(col, font, size, width) for col in columns]
+        if all(len(ls) <= max_lines and all(stringWidth(l, font, size) <= width for l in ls) for ls in wrapped):
+            return size, wrapped
+    # still too wide at 7 pt: the last line takes the remaining words and is cut like a cell
+    wrapped = [ls[:max_lines - 1] + [" ".join(ls[max_lines - 1:])] if len(ls) > max_lines else ls for ls in wrapped]
+    return size, [[_fit(l, font, size, width) for l in ls] for ls in wrapped]
+
+def write_pdf(rows, save_path, title="Salary Record", columns=None, progress=None):
+    """
+    Writes result dicts as a table, ROWS_PER_PAGE rows per page with the header repeated; each page is
+    drawn and closed before the next rows are read. Headers wrap onto two lines and cells are cut to their
+    column width, so neighbouring columns never overlap. Returns the number of rows.
+    """
+    from reportlab.lib.pagesizes import landscape, letter
+    from reportlab.pdfgen import canvas
+    first, rows = _peek(rows)
+    columns = list(columns or (first.keys() if first else []))
+    size = landscape(letter) if len(columns) > 3 else letter
+    w, h = size
+    margin = 40
+    pad = 4
+    line_h = (h - 2 * margin - 40) / (ROWS_PER_PAGE + 2)
+    col_w = (w - 2 * margin) / max(len(columns), 1)
+    header_size, headers = _header_lines(columns, col_w - 2 * pad)
+    header_h = line_h * max((len(ls) for ls in headers), default=1)
+    c = canvas.Canvas(save_path, pagesize=size)
+    n = 0
+    page = 0
+    batch = list(islice(rows, ROWS_PER_PAGE))
+    while True:
+        page += 1
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(margin, h - margin, title)
+        c.setFont("Helvetica", 9)
+        c.drawRightString(w - margin, h - margin, f"Page {page}")
+        top = h - margin - 30 + line_h - 4
+        c.setFillGray(0.85)
+        c.rect(margin, top - header_h, w - 2 * margin, header_h, stroke=0, fill=1)
+        c.setFillGray(0)
+        c.setFont("Helvetica-Bold", header_size)
+        for i, lines in enumerate(headers):
+            for k, line in enumerate(lines):
+                c.drawString(margin + i * col_w + pad, top - (k + 1) * line_h + 4, line)
+        c.setFont("Helvetica", 10)
+        y = top - header_h + 4
+        for r in batch:
+            y -= line_h
+            for i, col in enumerate(columns):
+                v = r.get(col)
+                if isinstance(v, (int, float)):
+                    c.drawRightString(margin + (i + 1) * col_w - pad, y, _fit(_cell(v), "Helvetica", 10, col_w - 2 * pad))
+                else:
+                    c.drawString(margin + i * col_w + pad, y, _fit(_cell(v), "Helvetica", 10, col_w - 2 * pad))
+            c.setStrokeGray(0.8)
+            c.line(margin, y - 4, w - margin, y - 4)
+        c.showPage()
+        n += len(batch)
+        if progress:
+            progress(n)
+        batch = list(islice(rows, ROWS_PER_PAGE))
+        if not batch:
+            break
+    c.save()
+    return n
+
+# ---------- Payslips ----------
+
+def payslip_filename(index, name):
+    safe = re.sub(r"[^\w.-]+", "_", str(name)).strip("_") or "employee"
+    return f"{index:05d}_{safe[:60]}.pdf"
+
+def _write_payslip_chunk(out_dir, start, rows, title):
+    # pool task: one small PDF per employee
+    from reportlab.lib.pagesizes import A5
+    from reportlab.pdfgen import canvas
+    w, h = A5
+    for i, r in enumerate(rows, start):
+        c = canvas.Canvas(os.path.join(out_dir, payslip_filename(i, r.get("Employee Name"))), pagesize=A5)
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(40, h - 60, "Payslip")
+        c.setFont("Helvetica", 10)
+        c.drawString(40, h - 78, title)
+        y = h - 120
+        for k, v in r.items():
+            c.setFont("Helvetica-Bold", 11)
+            c.drawString(40, y, f"{k}:")
+            c.setFont("Helvetica", 11)
+            c.drawRightString(w - 40, y, _cell(v))
+            y -= 22
+        c.showPage()
+        c.save()
+    return len(rows)
+
+def write_payslips(rows, out_dir, title="Salary Record", workers=None, progress=None):
+    """
+    Writes one PDF payslip per result dict into out_dir, PAYSLIP_CHUNK per pool task.
+    At most two tasks per worker are queued, so rows are read from the iterator only as fast as
+    they are written. Returns the number of payslips.
+    """
+    with profiler.stage("export_payslips") as st:
+        count = _write_payslips(rows, out_dir, title, workers, progress)
+        st.add(rows=count)
+    return count
+
+def _write_payslips(rows, out_dir, title, workers, progress):
+    os.makedirs(out_dir, exist_ok=True)
+    rows = iter(rows)
+    workers = workers or os.cpu_count() or 1
+    done = 0
+    start = 0
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(islice(rows, PAYSLIP_CHUNK))
+                if not chunk:
+                    break
+                pending.add(pool.submit(_write_payslip_chunk, out_dir, start, chunk, title))
+                start += len(chunk)
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in finished:
+                done += f.result()
+            if progress:
+                progress(done)
+    return done
+
+def export(rows, save_path, title="Salary Record", columns=None, progress=None):
+    # picks the writer from the extension: .pdf table, anything else xlsx
+    is_pdf = save_path.lower().endswith(".pdf")
+    with profiler.stage("export_pdf" if is_pdf else "export_xlsx") as st:
+        count = write_pdf(rows, save_path, title, columns, progress) if is_pdf else write_xlsx(rows, save_path, columns, progress)
+        st.add(rows=count)
+    return count
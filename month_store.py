@@ -0,0 +1,366 @@
+# month_store.py
+# Columnar on-disk cache of parsed attendance workbooks: one directory of .npy files per workbook,
+# next to the source and keyed by its content hash. Arrays are memory-mapped on load, so reloads,
+# payroll runs and multi-month queries skip openpyxl and read only the columns they need.
+# Requirements: numpy, openpyxl
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from bisect import bisect_right
+from collections.abc import Sequence
+
+import numpy as np
+
+import profiler
+from block_index import LABELS
+from payroll_engine import block_label_rows, compute_payroll_blocks, payroll_from_minutes, punch_hours
+from shift_analytics import shift_bounds
+from time_parser import clock_minutes, parse_matrix
+from workbook_stream import iter_employee_blocks, make_block
+
+CACHE_DIR = ".timetrack_cache"
+FORMAT_VERSION = 2  # bumped when parsing changes, so caches holding old parsed minutes are rebuilt
+PART_SIZE = 2000  # employees per part directory; bounds memory while a cache is written
+PROGRESS_EVERY = 200  # employees between progress reports while a cache is written
+
+# .npy file stems: full-row display text of the rows the navigator shows (Date / In Time / Out Time)
+# and of the Total Working Hours row, and the parsed minutes of the labeled rows the payroll reads
+_TEXT = {"date": "date_text", "in time": "in_text", "out time": "out_text", "total working hours": "total_text"}
+_MINUTES = {"in time": "in_min", "out time": "out_min", "total working hours": "total_min"}
+_NAV = ("date", "in time", "out time")
+
+# ---------- Keys & paths ----------
+
+def content_hash(file_path):
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for piece in iter(lambda: f.read(1 << 20), b""):
+            h.update(piece)
+    return h.hexdigest()
+
+def cache_dir(file_path, digest=None):
+    digest = digest or content_hash(file_path)
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR, digest[:32])
+
+# ---------- Writing ----------
+
+def _cell_text(v, label):
+    # text that parses back to the same minutes, so blocks rebuilt from the cache compute identically
+    if v is None or (isinstance(v, float) and v != v):
+        return ""
+    if label in ("in time", "out time") and isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool):
+        secs = int(round(clock_minutes(v) * 60))
+        h, rem = divmod(secs, 3600)
+        m, sec = divmod(rem, 60)
+        return f"{h:02d}:{m:02d}:{sec:02d}" if sec else f"{h:02d}:{m:02d}"
+    return str(v)
+
+def _text_rows(blocks, rows, label, width):
+    # chunk row rows[i] of every block as text, column 0 included; -1 or rows past the block stay blank
+    out = np.full((len(blocks), width), "", dtype=object)
+    for i, (blk, r) in enumerate(zip(blocks, rows)):
+        if 0 <= r < blk["chunk"].shape[0]:
+            row = blk["chunk"][r]
+            out[i, :len(row)] = [_cell_text(v, label) for v in row]
+    return out.astype(str)
+
+def _write_part(part_dir, blocks):
+    # the rest of a cache_write stage is reading the workbook
+    with profiler.stage("cache_columns", rows=len(blocks)):
+        _write_columns(part_dir, blocks)
+
+def _write_columns(part_dir, blocks):
+    os.makedirs(part_dir)
+
+    def put(name, arr):
+        np.save(os.path.join(part_dir, name + ".npy"), arr)
+
+    width = max(b["chunk"].shape[1] for b in blocks)
+    put("names", np.array([b["name"] for b in blocks], dtype=str))
+    put("starts", np.array([b["start_row"] for b in blocks], dtype=np.int32))
+    put("ends", np.array([b["end_row"] for b in blocks], dtype=np.int32))
+    put("labels", np.array([[b["labels"].get(l, -1) for l in LABELS] for b in blocks], dtype=np.int32).reshape(len(blocks), len(LABELS)))
+    nav = np.array([[b["rows"][k] for k in _NAV] for b in blocks], dtype=np.int32).reshape(len(blocks), len(_NAV))
+    put("nav", nav)
+    for k, label in enumerate(_NAV):
+        put(_TEXT[label], _text_rows(blocks, nav[:, k], label, width))
+    total = [b["labels"].get("total working hours", -1) for b in blocks]
+    put(_TEXT["total working hours"], _text_rows(blocks, total, "total working hours", width))
+    for label, stem in _MINUTES.items():
+        cells, _ = block_label_rows(blocks, label, width)
+        with profiler.stage("time_parse", rows=len(blocks), cells=cells.size):
+            minutes = parse_matrix(cells, duration=(label == "total working hours"))
+        put(stem, minutes)
+
+def save(file_path, blocks, digest=None, progress=None):
+    """
+    Writes the employee blocks of file_path (any iterable, consumed PART_SIZE at a time) as a columnar
+    cache for its current content; the directory is swapped in atomically. Returns the cache directory.
+    """
+    with profiler.stage("cache_write") as st:
+        target = _save(file_path, blocks, digest, progress, st)
+    return target
+
+def _save(file_path, blocks, digest, progress, st):
+    target = cache_dir(file_path, digest)
+    root = os.path.dirname(target)
+    os.makedirs(root, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=root, prefix=".tmp-")
+    try:
+        counts = []
+        batch = []
+        for n, block in enumerate(blocks, 1):
+            batch.append(block)
+            # reported while the workbook streams in, so small sheets show progress and Cancel takes effect
+            if progress and n % PROGRESS_EVERY == 0:
+                progress(n)
+            if len(batch) >= PART_SIZE:
+                _write_part(os.path.join(tmp, f"part-{len(counts):05d}"), batch)
+                counts.append(len(batch))
+                batch = []
+        if batch:
+            _write_part(os.path.join(tmp, f"part-{len(counts):05d}"), batch)
+            counts.append(len(batch))
+        st.add(rows=sum(counts))
+        meta = {"version": FORMAT_VERSION, "source": os.path.basename(file_path), "employees": sum(counts), "parts": counts}
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return target
+
+def save_edits(file_path, blocks, changed, progress=None):
+    """
+    Month cache for file_path after the In/Out cells of the employees in `changed` were edited in their
+    blocks and written back. Blocks backed by a cache (CachedBlocks) get a copy of it in which only those
+    rows are rewritten, with the other column files hard-linked, and are switched over to it; the
+    superseded directory is removed. Other block sequences are saved in full. Returns the new directory.
+    """
+    if not isinstance(blocks, CachedBlocks):
+        return save(file_path, blocks, progress=progress)
+    old = blocks.month.path
+    with profiler.stage("cache_write", rows=len(changed)):
+        target = _save_edits(file_path, blocks, sorted(changed))
+    blocks.month = CachedMonth(target)
+    if os.path.abspath(old) != os.path.abspath(target):
+        # a directory still memory-mapped on Windows stays behind until the folder is cleared
+        shutil.rmtree(old, ignore_errors=True)
+    return target
+
+def _link(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)  # file systems without hard links
+
+def _edited_columns(part_dir, blocks, rows):
+    # In/Out text and minute columns of one part with the given rows replaced from the (edited) blocks
+    out = {}
+    for label in ("in time", "out time"):
+        text = np.load(os.path.join(part_dir, _TEXT[label] + ".npy"))
+        nav = [b["rows"][label] for b in blocks]
+        text[rows] = _text_rows(blocks, nav, label, text.shape[1])
+        minutes = np.load(os.path.join(part_dir, _MINUTES[label] + ".npy"))
+        cells, _ = block_label_rows(blocks, label, minutes.shape[1] + 1)
+        with profiler.stage("time_parse", rows=len(blocks), cells=cells.size):
+            minutes[rows] = parse_matrix(cells)
+        out[_TEXT[label]] = text
+        out[_MINUTES[label]] = minutes
+    return out
+
+def _save_edits(file_path, blocks, changed):
+    month = blocks.month
+    target = cache_dir(file_path)
+    root = os.path.dirname(target)
+    tmp = tempfile.mkdtemp(dir=root, prefix=".tmp-")
+    try:
+        for p, part_dir in enumerate(month.parts):
+            lo, hi = month.bounds[p], month.bounds[p + 1]
+            idx = [i for i in changed if lo <= i < hi]
+            rewritten = _edited_columns(part_dir, [blocks[i] for i in idx], [i - lo for i in idx]) if idx else {}
+            out_dir = os.path.join(tmp, os.path.basename(part_dir))
+            os.makedirs(out_dir)
+            for name in os.listdir(part_dir):
+                stem = name[:-len(".npy")]
+                if stem in rewritten:
+                    np.save(os.path.join(out_dir, name), rewritten[stem])
+                else:
+                    _link(os.path.join(part_dir, name), os.path.join(out_dir, name))
+        shutil.copyfile(os.path.join(month.path, "meta.json"), os.path.join(tmp, "meta.json"))
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return target
+
+def build(file_path, progress=None):
+    # parse the workbook once, streaming, straight into the columnar cache
+    return save(file_path, iter_employee_blocks(file_path), progress=progress)
+
+# ---------- Reading ----------
+
+class CachedMonth:
+    """Memory-mapped view of one cached workbook; columns are loaded part by part on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.parts = [os.path.join(path, f"part-{i:05d}") for i in range(len(self.meta["parts"]))]
+        self.bounds = np.cumsum([0] + self.meta["parts"]).tolist()
+
+    def __len__(self):
+        return self.meta["employees"]
+
+    def part_column(self, part, name):
+        return np.load(os.path.join(self.parts[part], name + ".npy"), mmap_mode="r")
+
+    def column(self, name):
+        # whole column across parts; only this column's files are touched
+        cols = [self.part_column(p, name) for p in range(len(self.parts))]
+        if not cols:
+            return np.zeros(0)
+        if cols[0].ndim == 2:
+            width = max(c.shape[1] for c in cols)
+            fill = "" if cols[0].dtype.kind == "U" else np.nan
+            cols = [c if c.shape[1] == width else np.pad(c, ((0, 0), (0, width - c.shape[1])), constant_values=fill) for c in cols]
+        return np.concatenate(cols)
+
+    def names(self):
+        return self.column("names").tolist()
+
+    def hours(self, calc_method, employee_details=None):
+        """
+        Worked hours per employee (no Sunday/holiday credit), reading only the needed minute columns.
+        With employee_details, night shifts are paired across midnight as in payroll().
+        """
+        if len(self) == 0:
+            return np.zeros(0)  # a sheet without employees has no columns to read
+        total = np.nansum(self.column("total_min"), axis=1) / 60.0
+        if str(calc_method) != "1":
+            return total
+        labels = self.column("labels")
+        has_punches = (labels[:, LABELS.index("in time")] >= 0) & (labels[:, LABELS.index("out time")] >= 0)
+        overnight = None
+        if employee_details is not None:
+            shift_start, shift_end = shift_bounds(self.names(), employee_details)
+            overnight = shift_end < shift_start
+        return np.where(has_punches, punch_hours(self.column("in_min"), self.column("out_min"), overnight), total)
+
+    def payroll(self, days_in_month, num_sundays, num_holidays, calc_method, employee_details):
+        if len(self) == 0:
+            return []
+        with profiler.stage("cached_payroll", rows=len(self)):
+            labels = self.column("labels")
+            return payroll_from_minutes(
+                self.names(), self.column("total_min"), self.column("in_min"), self.column("out_min"),
+                (labels[:, LABELS.index("in time")] >= 0) & (labels[:, LABELS.index("out time")] >= 0),
+                num_sundays, num_holidays, calc_method, employee_details,
+            )
+
+    def block(self, i):
+        # rebuilds employee block i in the workbook_stream layout; rows other than the cached ones are blank
+        p = bisect_right(self.bounds, i) - 1
+        j = i - self.bounds[p]
+        start = int(self.part_column(p, "starts")[j])
+        end = int(self.part_column(p, "ends")[j])
+        offsets = [int(o) for o in self.part_column(p, "labels")[j]]
+        placed = list(zip(self.part_column(p, "nav")[j], _NAV))
+        placed.append((offsets[LABELS.index("total working hours")], "total working hours"))
+        height = max([end - start, 1] + [int(r) + 1 for r, _ in placed])
+        rows = [[None] for _ in range(height)]
+        for r, label in placed:
+            if r >= 0:
+                rows[r] = [str(t) if t else None for t in self.part_column(p, _TEXT[label])[j]]
+        if rows[0][0] is None:
+            rows[0][0] = str(self.part_column(p, "names")[j])
+        return make_block(rows, start, offsets)
+
+class CachedBlocks(Sequence):
+    """
+    Employee blocks backed by a CachedMonth, built on first access and then kept, so edits made
+    through the navigator stick to the same block objects.
+    """
+
+    def __init__(self, month):
+        self.month = month
+        self.built = {}
+
+    def __len__(self):
+        return len(self.month)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        if i not in self.built:
+            self.built[i] = self.month.block(i)
+        return self.built[i]
+
+    def __iter__(self):
+        # full scans (payroll, re-saving) do not keep every rebuilt block alive
+        for i in range(len(self)):
+            yield self.built.get(i) or self.month.block(i)
+
+    def payroll(self, days_in_month, num_sundays, num_holidays, calc_method, employee_details):
+        # columnar computation, with blocks touched through the navigator recomputed from their (edited) cells
+        results = self.month.payroll(days_in_month, num_sundays, num_holidays, calc_method, employee_details)
+        idx = sorted(self.built)
+        fresh = compute_payroll_blocks([self.built[i] for i in idx], days_in_month, num_sundays, num_holidays, calc_method, employee_details)
+        for i, r in zip(idx, fresh):
+            results[i] = r
+        return results
+
+def open_month(file_path, digest=None):
+    # CachedMonth for the current content of file_path, or None if it was never cached
+    path = cache_dir(file_path, digest)
+    try:
+        month = CachedMonth(path)
+    except (OSError, ValueError):
+        return None
+    return month if month.meta.get("version") == FORMAT_VERSION else None
+
+def load_blocks(file_path):
+    month = open_month(file_path)
+    return CachedBlocks(month) if month is not None else None
+
+# ---------- Multi-month queries ----------
+
+def monthly_hours(file_paths, calc_method="1", progress=None, employee_details=None):
+    """
+    Worked hours per employee for each workbook (caching any that are not cached yet); pass
+    employee_details so night shifts count as in the payroll. Returns [(file_path, names, hours array), ...].
+    """
+    out = []
+    for n, file_path in enumerate(file_paths):
+        month = open_month(file_path)
+        if month is None:
+            build(file_path)
+            month = open_month(file_path)
+        out.append((file_path, month.names(), month.hours(calc_method, employee_details)))
+        if progress:
+            progress(n + 1)
+    return out
+
+def ytd_hours(file_paths, calc_method="1", employee_details=None):
+    """{employee name: worked hours summed over all given months}, e.g. every month of the year so far."""
+    per_month = monthly_hours(file_paths, calc_method, employee_details=employee_details)
+    if not per_month:
+        return {}
+    names = np.concatenate([np.array(n, dtype=str) for _, n, _ in per_month])
+    hours = np.concatenate([h for _, _, h in per_month])
+    unique, inverse = np.unique(names, return_inverse=True)
+    totals = np.bincount(inverse, weights=hours, minlength=len(unique))
+    return dict(zip(unique.tolist(), totals.tolist()))
@@ -0,0 +1,135 @@
+# payroll_engine.py
+# Headless payroll computation for TimeTrack Pro (no Tk dependency).
+# Requirements: numpy, pandas (imported on first parse)
+
+import numpy as np
+
+import profiler
+from shift_analytics import SHIFT_COLUMNS, compliance, shift_bounds
+from time_parser import parse_matrix
+
+HOURS_PER_DAY = 9.5  # credited for every Sunday and company holiday
+
+# ---------- Block extraction ----------
+
+def block_label_rows(blocks, label, width):
+    """
+    Stacks the day columns (everything right of the label) of the label's row in each block, using the
+    offsets indexed at load time; blocks without that row give all-None. Returns (cells, has_row).
+    """
+    out = np.full((len(blocks), max(width - 1, 0)), None, dtype=object)
+    has = np.zeros(len(blocks), dtype=bool)
+    for i, b in enumerate(blocks):
+        off = b["labels"].get(label)
+        if off is not None:
+            row = b["chunk"][off, 1:]
+            out[i, :len(row)] = row
+            has[i] = True
+    return out, has
+
+# ---------- Hours & salary ----------
+
+def punch_hours(in_minutes, out_minutes, overnight=None):
+    """
+    Sums positive Out-In deltas per employee from parsed minutes; blank or 00:00 punches are skipped.
+    For employees flagged in overnight (on a shift that crosses midnight) an Out before the In counts as next day.
+    """
+    ins = np.array(in_minutes, dtype=float)
+    outs = np.array(out_minutes, dtype=float)
+    ins[ins == 0] = np.nan
+    outs[outs == 0] = np.nan
+    delta = outs - ins
+    if overnight is not None:
+        delta = np.where(np.asarray(overnight)[:, None] & (delta < 0), delta + 1440.0, delta)
+    delta[~(delta > 0)] = 0.0
+    return delta.sum(axis=1) / 60.0
+
+def hourly_rates(names, employee_details):
+    # an EmployeeStore answers for all names in one query; a plain dict is looked up per name
+    with profiler.stage("rate_lookup", rows=len(names)):
+        if hasattr(employee_details, "hourly_rates"):
+            table = employee_details.hourly_rates(set(names))
+        else:
+            table = {n: employee_details[n].get("Hourly Salary", 0) for n in set(names) if n in employee_details}
+    rates = np.zeros(len(names))
+    for i, name in enumerate(names):
+        try:
+            rates[i] = float(table.get(name, 0) or 0)
+        except Exception:
+            rates[i] = 0.0
+    return rates
+
+def reprice(results, employee_details):
+    # fresh result dicts with the salary recomputed from current hourly rates
+    rates = hourly_rates([r["Employee Name"] for r in results], employee_details)
+    return [
+        {**r, "Calculated Salary": float(r["Total Monthly Hours"] * rate)}
+        for r, rate in zip(results, rates)
+    ]
+
+def payroll_rows(names, total_matrix, in_matrix, out_matrix, has_punches, num_sundays, num_holidays, calc_method, employee_details):
+    # employees x days cell matrices in, result dicts out
+    # In/Out are parsed for both methods: shift compliance needs them
+    with profiler.stage("time_parse", rows=len(names), cells=np.size(total_matrix) + np.size(in_matrix) + np.size(out_matrix)):
+        total_minutes = parse_matrix(total_matrix, duration=True)
+        in_minutes = parse_matrix(in_matrix)
+        out_minutes = parse_matrix(out_matrix)
+    return payroll_from_minutes(
+        names, total_minutes, in_minutes, out_minutes,
+        has_punches, num_sundays, num_holidays, calc_method, employee_details,
+    )
+
+def payroll_from_minutes(names, total_minutes, in_minutes, out_minutes, has_punches, num_sundays, num_holidays, calc_method, employee_details):
+    """
+    Same as payroll_rows for already parsed minute matrices. Each result also carries the shift
+    compliance totals (shift_analytics.SHIFT_COLUMNS), None where the employee has no shift or no punches.
+    """
+    with profiler.stage("shift_compliance", rows=len(names)):
+        shift_start, shift_end = shift_bounds(names, employee_details)
+        shift = compliance(in_minutes, out_minutes, shift_start, shift_end)
+    hours = np.nansum(total_minutes, axis=1) / 60.0
+    if str(calc_method) == "1":
+        hours = np.where(has_punches, punch_hours(in_minutes, out_minutes, overnight=shift_end < shift_start), hours)
+    hours = hours + (num_sundays + num_holidays) * HOURS_PER_DAY
+    salary = hours * hourly_rates(names, employee_details)
+    # object columns so missing values come out as None rather than NaN
+    extra = np.column_stack([np.where(has_punches, shift[c], np.nan) for c in SHIFT_COLUMNS]).astype(object)
+    extra[np.isnan(extra.astype(float))] = None
+    return [
+        {"Employee Name": n, "Total Monthly Hours": float(h), "Calculated Salary": float(s), **dict(zip(SHIFT_COLUMNS, e))}
+        for n, h, s, e in zip(names, hours, salary, extra.tolist())
+    ]
+
+# ---------- Block streams ----------
+
+def compute_payroll_blocks(blocks, days_in_month, num_sundays, num_holidays, calc_method, employee_details, batch_size=2000, progress=None):
+    """
+    Computes total hours and salary for every employee in an iterable of employee blocks (see workbook_stream),
+    batch_size employees at a time so memory stays bounded for streamed sheets. calc_method '1' uses In/Out Time
+    (falls back to Total Working Hours when those rows are missing), '2' uses Total Working Hours.
+    progress(done), if given, is called after every batch with the number of employees computed so far.
+    Returns a list of dicts: [{"Employee Name":..., "Total Monthly Hours":..., "Calculated Salary":...}, ...]
+    """
+    results = []
+    batch = []
+    for block in blocks:
+        batch.append(block)
+        if len(batch) >= batch_size:
+            results.extend(_compute_batch(batch, days_in_month, num_sundays, num_holidays, calc_method, employee_details))
+            batch = []
+            if progress:
+                progress(len(results))
+    if batch:
+        results.extend(_compute_batch(batch, days_in_month, num_sundays, num_holidays, calc_method, employee_details))
+        if progress:
+            progress(len(results))
+    return results
+
+def _compute_batch(batch, days_in_month, num_sundays, num_holidays, calc_method, employee_details):
+    width = max(b["chunk"].shape[1] for b in batch)
+    with profiler.stage("chunk_slicing", rows=len(batch), cells=3 * len(batch) * max(width - 1, 0)):
+        total_matrix, _ = block_label_rows(batch, "total working hours", width)
+        in_matrix, has_in = block_label_rows(batch, "in time", width)
+        out_matrix, has_out = block_label_rows(batch, "out time", width)
+    return payroll_rows([b["name"] for b in batch], total_matrix, in_matrix, out_matrix, has_in & has_out,
+                        num_sundays, num_holidays, calc_method, employee_details)
@@ -0,0 +1,71 @@
+# payroll_runner.py
+# The payroll run behind process_excel, without Tk: picks the fastest source for a workbook (parsed blocks
+# in memory, the on-disk month cache, or one streamed parse that builds that cache) and reuses earlier results.
+# Shared by the GUI and the payroll service.
+# Requirements: numpy, pandas, openpyxl
+
+import numpy as np
+
+import month_store
+import profiler
+import workbook_cache
+from payroll_engine import compute_payroll_blocks, reprice
+from shift_analytics import shift_bounds
+from workbook_stream import estimate_blocks, iter_employee_blocks
+
+def run_payroll(file_path, params, employee_details, changed=None, progress=None):
+    """
+    Computes total hours and salary for params = (calc_method, days_in_month, num_sundays, num_holidays).
+    If results for the same file and month parameters are cached, only the employee indices in
+    `changed` are recomputed and merged into them; changed=None forces a full run.
+    Thread-safe; progress(done, total) is reported per batch. Returns a list of result dicts.
+    """
+    with profiler.stage("process_excel") as st:
+        results = _run_payroll(file_path, params, employee_details, changed, progress)
+        st.add(rows=len(results))
+    return results
+
+def _shift_key(results, employee_details):
+    # Shift Start/End of every employee in results; stored hours and compliance are only valid for the same shifts
+    start, end = shift_bounds([r["Employee Name"] for r in results], employee_details)
+    return np.nan_to_num(np.concatenate([start, end]), nan=-1.0).tobytes()
+
+def _run_payroll(file_path, params, employee_details, changed, progress):
+    calc_method, days_in_month, num_sundays, num_holidays = params
+    report = progress or (lambda done, total: None)
+    # reuse the blocks parsed for navigation, else the on-disk month cache (built by one streamed parse)
+    blocks = workbook_cache.peek_blocks(file_path)
+    if blocks is None:
+        month = month_store.open_month(file_path)
+        if month is None:
+            total = estimate_blocks(file_path)
+            try:
+                month_store.build(file_path, progress=lambda done: report(done, total))
+                month = month_store.open_month(file_path)
+            except OSError:
+                return compute_payroll_blocks(iter_employee_blocks(file_path), days_in_month, num_sundays, num_holidays, calc_method,
+                                              employee_details, batch_size=500, progress=lambda done: report(done, total))
+        # kept in memory, so the next run for the unchanged file skips hashing it and can reuse its results
+        blocks = month_store.CachedBlocks(month)
+        workbook_cache.replace_blocks(file_path, blocks)
+    hit = workbook_cache.get_results(file_path, params)
+    # only rates are refreshed on reuse; a changed shift needs the hours and compliance recomputed
+    cached = hit[0] if hit is not None and hit[1] == _shift_key(hit[0], employee_details) else None
+    if changed is not None and cached is not None and len(cached) == len(blocks):
+        idx = sorted(changed)
+        report(0, len(idx))
+        fresh = compute_payroll_blocks([blocks[i] for i in idx], days_in_month, num_sundays, num_holidays, calc_method, employee_details,
+                                       batch_size=500, progress=lambda done: report(done, len(idx)))
+        results = list(cached)
+        for i, r in zip(idx, fresh):
+            results[i] = r
+        # hourly rates may have been edited since the cached run
+        results = reprice(results, employee_details)
+    elif isinstance(blocks, month_store.CachedBlocks):
+        results = blocks.payroll(days_in_month, num_sundays, num_holidays, calc_method, employee_details)
+    else:
+        report(0, len(blocks))
+        results = compute_payroll_blocks(blocks, days_in_month, num_sundays, num_holidays, calc_method, employee_details,
+                                         batch_size=500, progress=lambda done: report(done, len(blocks)))
+    workbook_cache.store_results(file_path, params, results, _shift_key(results, employee_details))
+    return results
@@ -0,0 +1,214 @@
+# payroll_service.py
+# Long-running local payroll service: an asyncio HTTP server that keeps the employee master and recently
+# parsed workbooks warm (workbook_cache, month_store) and runs payroll on a bounded thread pool.
+# Usage: python -m time_track_pro serve --port 8765 --workers 4
+#
+#   GET  /health
+#   POST /payroll?method=1&days=31&sundays=4&holidays=1[&format=xlsx]   body: the .xlsx workbook
+#   POST /payroll?sha256=<hex>&method=...                                no body: a workbook uploaded before
+#
+# Answers JSON {"sha256", "employees", "results"} or, with format=xlsx, the results workbook.
+# Requirements: numpy, pandas, openpyxl
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import export_stream
+import month_store
+from payroll_runner import run_payroll
+
+MAX_UPLOAD = 256 * 1024 * 1024  # bytes accepted per workbook upload
+MAX_SPOOL = 32                  # uploaded workbooks kept on disk, oldest removed first
+QUEUE_PER_WORKER = 4            # requests allowed to wait per worker before answering 503
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+# ---------- Workbook spool ----------
+
+class Spool:
+    """Uploaded workbooks stored by content hash, so a re-upload lands on the same path and its warm caches."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def path(self, digest):
+        return os.path.join(self.directory, f"{digest}.xlsx")
+
+    def lock(self, digest):
+        # one payroll run per workbook at a time, so its month cache is built only once
+        with self._lock:
+            return self._locks.setdefault(digest, threading.Lock())
+
+    def put(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            fd, tmp = tempfile.mkstemp(suffix=".xlsx", dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self._prune()
+        else:
+            os.utime(path)  # recently used
+        return digest
+
+    def _prune(self):
+        files = [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith(".xlsx")]
+        files.sort(key=os.path.getmtime)
+        for old in files[:-MAX_SPOOL]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        # month caches of workbooks no longer spooled; .tmp- directories are caches still being written
+        kept = {os.path.basename(month_store.cache_dir(f, os.path.basename(f)[:-5])) for f in files[-MAX_SPOOL:]}
+        cache_root = os.path.join(self.directory, month_store.CACHE_DIR)
+        if os.path.isdir(cache_root):
+            for d in os.listdir(cache_root):
+                if d not in kept and not d.startswith(".tmp-"):
+                    shutil.rmtree(os.path.join(cache_root, d), ignore_errors=True)
+
+# ---------- Request handling ----------
+
+def _month_params(query):
+    def one(key, cast):
+        try:
+            return cast(query[key][0])
+        except (KeyError, IndexError, ValueError):
+            raise HTTPError(400, f"missing or invalid parameter: {key}")
+    method = one("method", str)
+    if method not in ("1", "2"):
+        raise HTTPError(400, "method must be 1 (In/Out Time) or 2 (Total Working Hours)")
+    return (method, one("days", int), one("sundays", int), one("holidays", int))
+
+def _to_xlsx(results):
+    buf = io.BytesIO()
+    export_stream.write_xlsx(iter(results), buf)
+    return buf.getvalue()
+
+class PayrollService:
+    def __init__(self, employee_details, spool_dir, workers=2):
+        self.employee_details = employee_details
+        self.spool = Spool(spool_dir)
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="payroll")
+        self.slots = None  # asyncio.Semaphore, created on the server's loop
+
+    def payroll(self, digest, params):
+        # runs on the pool; results for the same workbook and params come straight from workbook_cache
+        path = self.spool.path(digest)
+        if not os.path.exists(path):
+            raise HTTPError(404, "unknown workbook; upload it in the request body")
+        with self.spool.lock(digest):
+            # changed=set(): a repeat request reuses the stored results, repriced with the current rates
+            return run_payroll(path, params, self.employee_details, changed=set())
+
+    async def handle(self, method, target, body):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if url.path == "/health":
+            return 200, "application/json", json.dumps({"status": "ok", "workers": self.workers}).encode()
+        if url.path != "/payroll":
+            raise HTTPError(404, "not found")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+        params = _month_params(query)
+        if self.slots.locked():
+            raise HTTPError(503, "busy; try again shortly")
+        async with self.slots:
+            loop = asyncio.get_running_loop()
+            # hashing and writing the upload stay off the event loop too
+            digest = await loop.run_in_executor(None, self.spool.put, body) if body else (query.get("sha256") or [""])[0]
+            if not digest:
+                raise HTTPError(400, "send the workbook as the request body or pass sha256")
+            if not re.fullmatch(r"[0-9a-f]{64}", digest):
+                raise HTTPError(400, "sha256 must be 64 lowercase hex digits")
+            results = await loop.run_in_executor(self.pool, self.payroll, digest, params)
+            if (query.get("format") or ["json"])[0] == "xlsx":
+                return 200, XLSX_TYPE, await loop.run_in_executor(self.pool, _to_xlsx, results)
+        payload = {"sha256": digest, "employees": len(results), "results": results}
+        return 200, "application/json", json.dumps(payload).encode()
+
+    async def on_connection(self, reader, writer):
+        try:
+            status, ctype, data = await self._respond(reader)
+        except HTTPError as e:
+            status, ctype, data = e.status, "application/json", json.dumps({"error": str(e)}).encode()
+        except Exception as e:
+            status, ctype, data = 500, "application/json", json.dumps({"error": str(e)}).encode()
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: {ctype}\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n")
+        try:
+            writer.write(head.encode("latin-1") + data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise HTTPError(400, "bad request line")
+        method, target, _ = request_line
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_UPLOAD:
+            raise HTTPError(413, f"workbook larger than {MAX_UPLOAD} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return await self.handle(method.upper(), target, body)
+
+    async def serve(self, host, port, ready=None):
+        self.slots = asyncio.Semaphore(self.workers * QUEUE_PER_WORKER)
+        server = await asyncio.start_server(self.on_connection, host, port)
+        if ready:
+            ready(server.sockets[0].getsockname())
+        async with server:
+            await server.serve_forever()
+
+# ---------- Command line ----------
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m time_track_pro serve", description="run the local payroll service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="payroll runs at the same time")
+    parser.add_argument("--spool", default=os.path.join(tempfile.gettempdir(), "timetrack_service"),
+                        help="folder for uploaded workbooks and their month caches")
+    return parser
+
+def main(argv, employee_details):
+    args = build_parser().parse_args(argv)
+    service = PayrollService(employee_details, args.spool, args.workers)
+    ready = lambda addr: print(f"TimeTrack payroll service on http://{addr[0]}:{addr[1]} (spool: {args.spool})")
+    try:
+        asyncio.run(service.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.pool.shutdown(wait=False, cancel_futures=True)
+    return 0
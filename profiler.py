@@ -0,0 +1,192 @@
+# profiler.py
+# Per-stage instrumentation: wall time, rows/cells processed, parse failures and peak memory for each
+# pipeline stage, plus optional cProfile output. Disabled by default, where stage() returns a shared
+# no-op context manager, so the hooks cost one function call each.
+# Usage: python -m time_track_pro --profile report.txt [--cprofile]   (report.json for JSON)
+
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import time_parser
+
+enabled = False
+DEFAULT_REPORT = "profile_report.txt"
+
+_stats = {}  # stage name -> {"calls", "seconds", "rows", "cells", "parse_failures", "peak_kb"}
+_lock = threading.Lock()
+_local = threading.local()  # per-thread stack of open stages, for nested peak memory
+_cprofile = None
+_thread_profiles = []  # finished cProfile runs of worker threads, merged into the dump
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, rows=0, cells=0):
+        pass
+
+_NULL = _NullStage()
+
+class _Stage:
+    def __init__(self, name, rows, cells):
+        self.name = name
+        self.rows = rows
+        self.cells = cells
+        self.child_peak = 0
+
+    def add(self, rows=0, cells=0):
+        # counts only known while the stage runs
+        self.rows += rows
+        self.cells += cells
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault("stack", [])
+        stack.append(self)
+        self.failed = time_parser.get_counters()["failed"]
+        self.mem = None
+        if tracemalloc.is_tracing():
+            self.mem = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.t0
+        stack = _local.stack
+        stack.pop()
+        peak_kb = 0.0
+        if self.mem is not None and tracemalloc.is_tracing():
+            # peak above the memory in use when the stage started; a nested stage reset the tracemalloc
+            # peak, so its own peak is carried up to this one
+            peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            peak_kb = max(peak - self.mem, 0) / 1024
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+        failures = time_parser.get_counters()["failed"] - self.failed
+        with _lock:
+            s = _stats.setdefault(self.name, {"calls": 0, "seconds": 0.0, "rows": 0, "cells": 0, "parse_failures": 0, "peak_kb": 0.0})
+            s["calls"] += 1
+            s["seconds"] += seconds
+            s["rows"] += self.rows
+            s["cells"] += self.cells
+            s["parse_failures"] += failures
+            s["peak_kb"] = max(s["peak_kb"], peak_kb)
+        return False
+
+def split_args(argv):
+    """Removes --profile PATH (or --profile=PATH) and --cprofile from argv; returns (rest, path or None, cprofile)."""
+    rest, path, use_cprofile = [], None, False
+    args = iter(argv)
+    for a in args:
+        if a == "--cprofile":
+            use_cprofile = True
+        elif a == "--profile":
+            path = next(args, None) or DEFAULT_REPORT
+        elif a.startswith("--profile="):
+            path = a.split("=", 1)[1] or DEFAULT_REPORT
+        else:
+            rest.append(a)
+    if use_cprofile and path is None:
+        path = DEFAULT_REPORT
+    return rest, path, use_cprofile
+
+def stage(name, rows=0, cells=0):
+    """with stage("payroll", rows=n): ... records the block as one call of that stage when profiling is on."""
+    if not enabled:
+        return _NULL
+    return _Stage(name, rows, cells)
+
+@contextmanager
+def thread_profile():
+    # cProfile only sees the thread that enabled it; background jobs wrap their work in this
+    if not enabled or _cprofile is None:
+        yield
+        return
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        with _lock:
+            _thread_profiles.append(prof)
+
+def enable(memory=True, cprofile=False):
+    # memory tracing (tracemalloc) slows allocation-heavy code noticeably; cprofile more so
+    global enabled, _cprofile
+    reset()
+    enabled = True
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if cprofile:
+        _cprofile = cProfile.Profile()
+        _cprofile.enable()
+
+def disable():
+    global enabled
+    enabled = False
+    if _cprofile is not None:
+        _cprofile.disable()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _thread_profiles.clear()
+
+def stats():
+    with _lock:
+        return {k: dict(v) for k, v in _stats.items()}
+
+def merge(other):
+    # adds stats() taken in another process (batch workers); peaks are per process, so the largest is kept
+    with _lock:
+        for name, o in other.items():
+            s = _stats.setdefault(name, {"calls": 0, "seconds": 0.0, "rows": 0, "cells": 0, "parse_failures": 0, "peak_kb": 0.0})
+            for k in ("calls", "seconds", "rows", "cells", "parse_failures"):
+                s[k] += o[k]
+            s["peak_kb"] = max(s["peak_kb"], o["peak_kb"])
+
+def report():
+    """Per-stage table as text, slowest stage first."""
+    rows = sorted(stats().items(), key=lambda kv: kv[1]["seconds"], reverse=True)
+    lines = [f"{'Stage':<28}{'Calls':>7}{'Seconds':>11}{'Rows':>10}{'Cells':>12}{'Failures':>10}{'Peak KB':>11}"]
+    for name, s in rows:
+        lines.append(f"{name:<28}{s['calls']:>7}{s['seconds']:>11.3f}{s['rows']:>10}{s['cells']:>12}"
+                     f"{s['parse_failures']:>10}{s['peak_kb']:>11.0f}")
+    return "\n".join(lines)
+
+def dump(path):
+    """
+    Writes the stage report to path (JSON if it ends in .json, else text). With cProfile on, the raw
+    pstats data goes next to it as <path>.pstats and the top functions are appended to a text report.
+    """
+    if path.lower().endswith(".json"):
+        text = json.dumps(stats(), indent=2)
+    else:
+        text = report() + "\n"
+    if _cprofile is not None:
+        _cprofile.disable()
+        with _lock:
+            merged = pstats.Stats(_cprofile, *_thread_profiles)
+        merged.dump_stats(path + ".pstats")
+        if not path.lower().endswith(".json"):
+            out = io.StringIO()
+            merged.stream = out
+            merged.sort_stats("cumulative").print_stats(30)
+            text += "\n" + out.getvalue()
+        if enabled:
+            _cprofile.enable()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
@@ -0,0 +1,263 @@
+# punch_log.py
+# Streaming ingest of raw punch-event CSVs (employee id, timestamp) from biometric terminals, as an
+# alternative to the 23-row Excel layout. Events are read in chunks and folded into per employee x day
+# first/last punch matrices, so memory depends on employees x days, not on the number of events. Night
+# shifts are counted on the day they start. The state is saved next to the log and only bytes appended
+# since the last run are read again.
+# Requirements: numpy, pandas
+
+import csv
+import hashlib
+import io
+import os
+
+import numpy as np
+
+import profiler
+from month_store import CACHE_DIR
+from payroll_engine import payroll_from_minutes
+from shift_analytics import DAY, shift_bounds
+
+CHUNK_ROWS = 200_000  # events parsed per pandas chunk
+HEAD_BYTES = 65536    # start of the log that identifies it when resuming
+
+class _Window(io.RawIOBase):
+    # read-only view of bytes [start, end) of a file, so pandas never sees a half-written last line
+    def __init__(self, f, start, end):
+        self.f = f
+        self.pos = start
+        self.end = end
+        f.seek(start)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        n = min(len(buf), self.end - self.pos)
+        if n <= 0:
+            return 0
+        data = self.f.read(n)
+        buf[:len(data)] = data
+        self.pos += len(data)
+        return len(data)
+
+def _complete_end(f, size):
+    # offset just past the last newline; a trailing partial line is left for the next run
+    pos = size
+    while pos > 0:
+        step = min(65536, pos)
+        f.seek(pos - step)
+        block = f.read(step)
+        i = block.rfind(b"\n")
+        if i >= 0:
+            return pos - step + i + 1
+        pos -= step
+    return 0
+
+def _head_digest(f, length):
+    f.seek(0)
+    return hashlib.sha256(f.read(min(length, HEAD_BYTES))).hexdigest()
+
+def day_starts(names, employee_details):
+    """
+    Minute after midnight at which each name's working day begins: midnight, or for a shift that crosses
+    midnight the middle of its off-duty gap (14:00 for 22:00-06:00), so both punches of a night share a day.
+    """
+    if employee_details is None or not len(names):
+        return np.zeros(len(names))
+    start, end = shift_bounds(names, employee_details)
+    return np.where(end < start, (start + end) / 2, 0.0)
+
+class LogMismatch(ValueError):
+    """The log no longer starts with the bytes a saved PunchLog was built from (replaced or truncated)."""
+
+class PunchLog:
+    """
+    Per employee x day aggregates of punch events: the first punch of a day is the In time, the last
+    one the Out time (a single punch leaves Out blank). Events may arrive in any order and any number of calls.
+    For employees on a night shift (see day_starts) the day runs from its day start to the next one, so
+    punches before it belong to the previous day. employee_details supplies the shifts of new ids.
+    """
+
+    def __init__(self, employee_details=None):
+        self.employee_details = employee_details
+        self.ids = []
+        self.id_index = {}
+        self.day_start = np.zeros(0)  # per id: minute its working day begins
+        self.days = []        # numpy datetime64[D] values, in first-seen order
+        self.day_index = {}
+        self.first = np.full((0, 0), np.nan)  # minutes after midnight of the day; past 1440 for night punches
+        self.last = np.full((0, 0), np.nan)
+        self.count = np.zeros((0, 0), dtype=np.int32)
+        self.offset = 0       # bytes of the source log already ingested
+        self.head = None      # digest of the log's first bytes, to detect a replaced file
+        self.columns = None   # CSV column names, reused when reading appended lines
+        self.bad_rows = 0     # events without a usable id or timestamp
+
+    # ----- aggregation -----
+    def _rows(self, keys, index, items):
+        # positions of keys, registering unseen ones
+        pos = np.empty(len(keys), dtype=np.int64)
+        for i, k in enumerate(keys):
+            j = index.get(k)
+            if j is None:
+                j = index[k] = len(items)
+                items.append(k)
+            pos[i] = j
+        return pos
+
+    def _grow(self):
+        shape = (len(self.ids), len(self.days))
+        if shape == self.first.shape:
+            return
+        def grown(a, fill):
+            out = np.full((max(shape[0], a.shape[0]), max(shape[1], a.shape[1])), fill, dtype=a.dtype)
+            out[:a.shape[0], :a.shape[1]] = a
+            return out
+        self.first = grown(self.first, np.nan)
+        self.last = grown(self.last, np.nan)
+        self.count = grown(self.count, 0)
+
+    def add_events(self, ids, timestamps, time_format=None):
+        """
+        Folds a batch of events in: ids (strings) and timestamps (datetime64 or strings). Strings are parsed
+        as ISO 8601 (or time_format, a strptime pattern); only values that fail are retried one by one.
+        """
+        import pandas as pd
+        ids = pd.Series(ids, dtype=object).astype(str).str.strip()
+        raw = pd.Series(timestamps)
+        ts = pd.to_datetime(raw, errors="coerce", format=time_format or "ISO8601")
+        retry = ts.isna() & raw.notna()
+        if retry.any():
+            ts[retry] = pd.to_datetime(raw[retry], errors="coerce", format="mixed")
+        ok = ts.notna().to_numpy() & (ids != "").to_numpy() & (ids.str.lower() != "nan").to_numpy()
+        self.bad_rows += int((~ok).sum())
+        if not ok.any():
+            return
+        ids, ts = ids[ok], ts[ok]
+        codes, uniques = pd.factorize(ids.to_numpy())
+        known = len(self.ids)
+        pos = self._rows(uniques, self.id_index, self.ids)[codes]
+        if len(self.ids) > known:
+            self.day_start = np.concatenate([self.day_start, day_starts(self.ids[known:], self.employee_details)])
+        day = ts.dt.normalize().to_numpy().astype("datetime64[D]")
+        minute = (ts.dt.hour * 60 + ts.dt.minute + ts.dt.second / 60.0).to_numpy()
+        early = minute < self.day_start[pos]
+        day = day - early.astype(np.int64).astype("timedelta64[D]")
+        minute = minute + early * DAY
+        frame = pd.DataFrame({"row": pos, "day": day, "minute": minute})
+        g = frame.groupby(["row", "day"], sort=False)["minute"].agg(["min", "max", "count"])
+        rows = g.index.get_level_values(0).to_numpy()
+        cols = self._rows(g.index.get_level_values(1).to_numpy().astype("datetime64[D]"), self.day_index, self.days)
+        self._grow()
+        # (row, col) pairs are unique within a grouped batch, so plain fancy assignment merges them
+        self.first[rows, cols] = np.fmin(self.first[rows, cols], g["min"].to_numpy())
+        self.last[rows, cols] = np.fmax(self.last[rows, cols], g["max"].to_numpy())
+        self.count[rows, cols] += g["count"].to_numpy().astype(np.int32)
+
+    def ingest(self, csv_path, id_column=None, time_column=None, time_format=None, chunk_rows=CHUNK_ROWS, progress=None):
+        """
+        Reads the events appended to csv_path since the last ingest (the whole file the first time) in
+        chunks of chunk_rows. Columns default to the first two (id, timestamp). Returns the events read.
+        """
+        import pandas as pd
+        read = 0
+        with profiler.stage("punch_ingest") as st, open(csv_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if self.head is not None and (size < self.offset or _head_digest(f, self.offset) != self.head):
+                raise LogMismatch(f"{csv_path} is not the log this state was built from; start a new PunchLog")
+            if self.columns is None:
+                f.seek(0)
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    return 0  # header not complete yet
+                self.columns = [c.strip() for c in next(csv.reader([line.decode("utf-8-sig")]))]
+                self.offset = len(line)
+            end = _complete_end(f, size)
+            if end <= self.offset:
+                return 0
+            window = io.BufferedReader(_Window(f, self.offset, end), buffer_size=1 << 20)
+            reader = pd.read_csv(window, chunksize=chunk_rows, dtype=str, skipinitialspace=True,
+                                 header=None, names=self.columns)
+            for chunk in reader:
+                id_col = id_column or self.columns[0]
+                time_col = time_column or self.columns[1]
+                self.add_events(chunk[id_col].to_numpy(), chunk[time_col].to_numpy(), time_format)
+                read += len(chunk)
+                if progress:
+                    progress(read)
+            self.offset = end
+            self.head = _head_digest(f, end)
+            st.add(rows=read)
+        return read
+
+    # ----- results -----
+    def minutes(self):
+        """
+        (names, in, out, total) with days in calendar order; In/Out are times of day, so a night shift's
+        Out is earlier than its In. total is Out-In where both punches exist.
+        """
+        order = np.argsort(np.array(self.days, dtype="datetime64[D]")) if self.days else np.zeros(0, dtype=int)
+        first = self.first[:, order]
+        last = np.where(self.count[:, order] >= 2, self.last[:, order], np.nan)
+        total = last - first
+        total[~(total > 0)] = np.nan
+        return list(self.ids), first % DAY, last % DAY, total
+
+    def payroll(self, num_sundays, num_holidays, calc_method, employee_details):
+        # the same computation as workbook rows; employee ids are looked up as names in the employee master
+        names, ins, outs, total = self.minutes()
+        return payroll_from_minutes(names, total, ins, outs, np.ones(len(names), dtype=bool),
+                                    num_sundays, num_holidays, calc_method, employee_details)
+
+    # ----- persistence -----
+    def save(self, state_path):
+        tmp = state_path + ".tmp.npz"
+        np.savez(tmp, ids=np.array(self.ids, dtype=str), day_start=self.day_start, days=np.array(self.days, dtype="datetime64[D]"),
+                 first=self.first, last=self.last, count=self.count,
+                 meta=np.array([str(self.offset), self.head or "", "\t".join(self.columns or []), str(self.bad_rows)]))
+        os.replace(tmp, state_path)
+
+    @classmethod
+    def load(cls, state_path, employee_details=None):
+        log = cls(employee_details)
+        with np.load(state_path) as data:
+            log.ids = data["ids"].tolist()
+            log.day_start = data["day_start"]
+            log.days = list(data["days"])
+            log.first, log.last, log.count = data["first"], data["last"], data["count"]
+            offset, head, columns, bad = data["meta"].tolist()
+        log.id_index = {k: i for i, k in enumerate(log.ids)}
+        log.day_index = {d: i for i, d in enumerate(log.days)}
+        log.offset, log.head, log.bad_rows = int(offset), head or None, int(bad)
+        log.columns = columns.split("\t") if columns else None
+        return log
+
+def state_path(csv_path):
+    directory = os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR)
+    return os.path.join(directory, f"punches-{os.path.basename(csv_path)}.npz")
+
+def process_punch_log(csv_path, params, employee_details, progress=None):
+    """
+    Payroll straight from a punch log for params = (calc_method, days_in_month, num_sundays, num_holidays).
+    Aggregates are kept in .timetrack_cache next to the log, so a later call only reads appended events;
+    they are rebuilt when an employee's shift moved to or from a night shift since they were saved.
+    """
+    calc_method, _, num_sundays, num_holidays = params
+    path = state_path(csv_path)
+    log = None
+    if os.path.exists(path):
+        try:
+            log = PunchLog.load(path, employee_details)
+            if np.array_equal(log.day_start, day_starts(log.ids, employee_details)):
+                log.ingest(csv_path, progress=progress)
+            else:
+                log = None  # punches were grouped into days with other shifts: start over
+        except (OSError, ValueError, KeyError):
+            log = None  # unreadable state, or the log was replaced/truncated: start over
+    if log is None:
+        log = PunchLog(employee_details)
+        log.ingest(csv_path, progress=progress)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    log.save(path)
+    return log.payroll(num_sundays, num_holidays, calc_method, employee_details)
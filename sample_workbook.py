@@ -0,0 +1,77 @@
+# sample_workbook.py
+# Synthetic attendance workbooks in the layout upload_file / process_excel expect, for benchmarks and demos:
+# two title rows, then per employee a 23-row block (name, Date, In Time, Out Time, Total Working Hours,
+# blank rows up to 22, one blank separator).
+# Usage: python sample_workbook.py attendance.xlsx --employees 1000 --days 31 --blank 0.03 --malformed 0.02
+# Requirements: openpyxl
+
+import argparse
+import random
+
+from block_index import BLOCK_ROWS
+
+MALFORMED = ("absent", "9.75.00", "25:99", "--", "n/a")
+
+def employee_name(i):
+    return f"Employee {i + 1:05d}"
+
+def employee_rows(name, days, rng, blank=0.03, malformed=0.02):
+    """The BLOCK_ROWS rows of one employee; each day is blank or malformed with the given probabilities."""
+    dates, ins, outs, totals = ["Date"], ["In Time"], ["Out Time"], ["Total Working Hours"]
+    for d in range(days):
+        dates.append(f"{d + 1:02d}")
+        x = rng.random()
+        if x < blank:
+            ins.append(None); outs.append(None); totals.append(None)
+        elif x < blank + malformed:
+            ins.append(rng.choice(MALFORMED)); outs.append(f"{rng.randint(17, 19):02d}:{rng.randint(0, 59):02d}")
+            totals.append(rng.choice(MALFORMED))
+        else:
+            start = rng.randint(8 * 60, 10 * 60)
+            worked = rng.randint(7 * 60, 10 * 60)
+            end = start + worked
+            ins.append(f"{start // 60:02d}:{start % 60:02d}")
+            outs.append(f"{end // 60:02d}:{end % 60:02d}")
+            totals.append(f"{worked // 60:02d}:{worked % 60:02d}")
+    rows = [[name], dates, ins, outs, totals]
+    while len(rows) < BLOCK_ROWS:
+        rows.append([None])
+    return rows
+
+def make_workbook(file_path, employees, days=31, blank=0.03, malformed=0.02, seed=0):
+    """Writes the workbook with a write-only openpyxl workbook (constant memory); returns the employee names."""
+    from openpyxl import Workbook
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Attendance")
+    ws.append(["Monthly Attendance Report"])
+    ws.append([None])
+    names = []
+    for i in range(employees):
+        name = employee_name(i)
+        names.append(name)
+        for row in employee_rows(name, days, rng, blank, malformed):
+            ws.append(row)
+        ws.append([None])
+    wb.save(file_path)
+    return names
+
+def sample_employee_details(names, seed=0):
+    # hourly rates for the generated names, same shape as the employee master
+    rng = random.Random(seed)
+    return {n: {"Hourly Salary": round(rng.uniform(80, 250), 2), "Shift Start": "09:00", "Shift End": "18:00"} for n in names}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="write a synthetic attendance workbook")
+    parser.add_argument("output", help="workbook to write (.xlsx)")
+    parser.add_argument("--employees", type=int, default=100)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--blank", type=float, default=0.03, help="share of blank days")
+    parser.add_argument("--malformed", type=float, default=0.02, help="share of days with unparseable cells")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    make_workbook(args.output, args.employees, args.days, args.blank, args.malformed, args.seed)
+    print(f"Wrote {args.employees} employees x {args.days} days to {args.output}")
+
+if __name__ == "__main__":
+    main()
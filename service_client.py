@@ -0,0 +1,55 @@
+# service_client.py
+# Thin client for payroll_service: sends a workbook (or just its hash, when the service has it already)
+# with the month parameters and gets the results back. Standard library only.
+
+import hashlib
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+
+TIMEOUT = 600  # seconds; a cold run parses the whole workbook
+
+class ServiceError(Exception):
+    """The service answered with an error (bad parameters, unreadable workbook, ...)."""
+
+class ServiceBusy(ServiceError, ConnectionError):
+    """503: the service's queue is full. An OSError too, so callers fall back to a local run as when it is down."""
+
+def _post(url, data=None, timeout=TIMEOUT):
+    req = urllib.request.Request(url, data=data or b"", method="POST",
+                                 headers={"Content-Type": "application/octet-stream"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.read()
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read().decode("utf-8")).get("error", e.reason)
+        except ValueError:
+            message = e.reason
+        raise (ServiceBusy if e.code == 503 else ServiceError)(f"{e.code}: {message}") from None
+
+def payroll(base_url, file_path, params, fmt="json", timeout=TIMEOUT):
+    """
+    Payroll for file_path with params = (calc_method, days_in_month, num_sundays, num_holidays).
+    Returns the list of result dicts (fmt="json") or the results workbook as bytes (fmt="xlsx").
+    Connection problems and a busy service raise OSError (urllib.error.URLError, ServiceBusy), so callers
+    can fall back to a local run.
+    """
+    with open(file_path, "rb") as f:
+        data = f.read()
+    calc_method, days, sundays, holidays = params
+    query = {"method": calc_method, "days": days, "sundays": sundays, "holidays": holidays, "format": fmt}
+    url = base_url.rstrip("/") + "/payroll?"
+    try:
+        # the service keeps uploads by content hash; only send the bytes when it does not know them
+        body = _post(url + urllib.parse.urlencode({**query, "sha256": hashlib.sha256(data).hexdigest()}), timeout=timeout)
+    except ServiceError as e:
+        if not str(e).startswith("404"):
+            raise
+        body = _post(url + urllib.parse.urlencode(query), data, timeout=timeout)
+    return json.loads(body.decode("utf-8"))["results"] if fmt == "json" else body
+
+def health(base_url, timeout=2):
+    with urllib.request.urlopen(base_url.rstrip("/") + "/health", timeout=timeout) as resp:
+        return json.loads(resp.read().decode("utf-8"))
@@ -0,0 +1,65 @@
+# shift_analytics.py
+# Shift compliance for a whole month at once: late arrival, early departure, overtime beyond the shift
+# and overnight punches, computed as array operations over employees x days minute matrices.
+# Requirements: numpy
+
+import numpy as np
+
+from time_parser import clock_minutes
+
+DAY = 1440.0
+SHIFT_COLUMNS = ("Late Minutes", "Early Departure Minutes", "Overtime Minutes", "Overnight Days")
+
+def shift_bounds(names, employee_details):
+    """Shift Start / Shift End of each name in minutes after midnight; NaN where missing or unparseable."""
+    if hasattr(employee_details, "shifts"):
+        table = employee_details.shifts(set(names))
+    else:
+        table = {n: (employee_details[n].get("Shift Start"), employee_details[n].get("Shift End"))
+                 for n in set(names) if n in employee_details}
+    # a handful of distinct shift strings, so each is parsed once
+    parsed = {n: (clock_minutes(s or None), clock_minutes(e or None)) for n, (s, e) in table.items()}
+    start = np.array([parsed.get(n, (np.nan, np.nan))[0] for n in names], dtype=float).reshape(len(names))
+    end = np.array([parsed.get(n, (np.nan, np.nan))[1] for n in names], dtype=float).reshape(len(names))
+    return start, end
+
+def _signed(delta):
+    # minute difference wrapped into [-720, 720), so 00:30 vs a 22:00 start reads as 150 late
+    return (delta + DAY / 2) % DAY - DAY / 2
+
+def compliance(in_minutes, out_minutes, shift_start, shift_end):
+    """
+    Per-employee totals for the month from parsed punches (employees x days, NaN or 0 = no punch, as in
+    payroll_engine.punch_hours) and per-employee shift bounds. A shift ending before it starts is an
+    overnight shift; on those an Out punch earlier than the In punch of the same day is counted as past
+    midnight. On other shifts such an Out is ignored, as punch_hours credits nothing for that day.
+    Returns {column in SHIFT_COLUMNS: float array}; NaN for employees without a usable shift.
+    """
+    ins = np.array(in_minutes, dtype=float)
+    outs = np.array(out_minutes, dtype=float)
+    ins[ins == 0] = np.nan
+    outs[outs == 0] = np.nan
+    start = np.asarray(shift_start, dtype=float)[:, None]
+    end = np.asarray(shift_end, dtype=float)[:, None]
+    length = (end - start) % DAY
+    length[length == 0] = np.nan  # start == end is not a usable shift
+    night = end < start
+
+    backwards = ~np.isnan(ins) & ~np.isnan(outs) & (outs < ins)
+    overnight = backwards & night
+    outs[backwards & ~night] = np.nan
+    late = np.clip(_signed(ins - start), 0, None)
+    early = np.clip(_signed(end - outs), 0, None)
+    both = ~np.isnan(ins) & ~np.isnan(outs)
+    worked = np.where(both, (outs - ins) % DAY, np.nan)
+    overtime = np.clip(worked - length, 0, None)
+
+    has_shift = ~np.isnan(length[:, 0])
+    def total(m):
+        return np.where(has_shift, np.nansum(m, axis=1), np.nan)
+    return {
+        "Late Minutes": total(late),
+        "Early Departure Minutes": total(early),
+        "Overtime Minutes": total(overtime),
+        "Overnight Days": total(overnight.astype(float)),
+    }
@@ -0,0 +1,7 @@
+# conftest.py
+# The modules live flat in the repository root; make them importable when pytest runs from anywhere.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,27 @@
+# test_batch_cli.py
+# Exit status of batch mode when sheets could not be processed.
+
+import pytest
+
+import batch_cli
+
+ARGS = ["batch", "--days", "31", "--sundays", "4", "--holidays", "1", "--method", "1"]
+
+@pytest.fixture
+def one_sheet_fails(monkeypatch):
+    def run_batch(files, days, sundays, holidays, method, details, workers=None, skipped=None):
+        skipped.append((files[0], "Broken", "unreadable"))
+        return [{"Source File": "a.xlsx", "Sheet": "Good", "Employee Name": "Anna"}]
+    monkeypatch.setattr(batch_cli, "run_batch", run_batch)
+
+def test_skipped_sheet_fails_the_run(tmp_path, one_sheet_fails, capsys):
+    (tmp_path / "a.xlsx").write_bytes(b"")
+    out = tmp_path / "out.csv"
+    assert batch_cli.main(ARGS + [str(tmp_path / "a.xlsx"), "--output", str(out)], {}) == 1
+    assert "1 sheet(s) skipped" in capsys.readouterr().out
+    assert "Anna" in out.read_text()  # the other sheets' results are still written
+
+def test_keep_going(tmp_path, one_sheet_fails):
+    (tmp_path / "a.xlsx").write_bytes(b"")
+    args = ARGS + [str(tmp_path / "a.xlsx"), "--output", str(tmp_path / "out.csv"), "--keep-going"]
+    assert batch_cli.main(args, {}) == 0
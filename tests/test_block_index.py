@@ -0,0 +1,95 @@
+# test_block_index.py
+# BlockIndexer on the classic 22+1 layout and on uneven sheets, and the blocks workbook_stream assembles from it.
+
+import numpy as np
+
+from block_index import BLOCK_ROWS, CHUNK_SIZE, LABELS, START_ROW, BlockIndexer
+from workbook_stream import blocks_from_rows
+
+TITLE = ["Monthly Attendance Report", None]
+LABELED = ["Date", "In Time", "Out Time", "Total Working Hours"]
+
+def index(col):
+    # (starts, ends, sheet row of each label per block, -1 if absent) for a first column fed row by row
+    indexer = BlockIndexer()
+    blocks = []
+    for r, v in enumerate(col):
+        blocks.extend(indexer.feed(r, v))
+    blocks.extend(indexer.finish())
+    rows = [[start + off if off >= 0 else -1 for off in offsets] for start, _, offsets in blocks]
+    return [b[0] for b in blocks], [b[1] for b in blocks], rows
+
+def label_rows(rows, label):
+    return [r[LABELS.index(label)] for r in rows]
+
+def classic_block(name):
+    # name row, the four labels, blank rows up to 22, one blank separator
+    return [name] + LABELED + [None] * (BLOCK_ROWS - 5) + [None]
+
+def test_classic_layout():
+    col = TITLE + classic_block("Anna") + classic_block("Ben")
+    starts, ends, rows = index(col)
+    assert starts == [2, 25]
+    # trailing blank rows are trimmed from labeled blocks
+    assert ends == [7, 30]
+    assert label_rows(rows, "date") == [3, 26]
+    assert label_rows(rows, "total working hours") == [6, 29]
+
+def test_missing_separator():
+    # Ben's block follows Anna's without a blank row; his name row starts the next block
+    col = TITLE + ["Anna"] + LABELED + ["Ben"] + LABELED + [None]
+    starts, ends, rows = index(col)
+    assert starts == [2, 7]
+    assert ends == [7, 12]
+    assert label_rows(rows, "in time") == [4, 9]
+
+def test_extra_rows_and_missing_label():
+    # after a blank separator the block starts at its first non-blank row, whatever sits before "Date"
+    col = (TITLE
+           + ["Anna", "Date", "In Time", "Out Time", "Total Working Hours", "Remarks", None]
+           + ["Ben", "Department: Sales", "Date", "Total Working Hours", None, None])
+    starts, ends, rows = index(col)
+    assert starts == [2, 9]
+    assert ends == [8, 13]
+    assert rows == [[3, 4, 5, 6], [11, -1, -1, 12]]
+
+def test_extra_title_row_before_first_block():
+    # without a separator the first block starts at the unlabeled row nearest its "Date"
+    col = TITLE + ["Period: January", "Anna"] + LABELED + [None]
+    starts, _, rows = index(col)
+    assert starts == [3]
+    assert label_rows(rows, "date") == [4]
+
+def test_label_normalization():
+    col = TITLE + ["Anna", "  DATE ", "in time", "Out Time  ", "total working hours", None]
+    assert index(col)[2] == [[3, 4, 5, 6]]
+
+def test_stride_fallback_without_date_labels():
+    # no "Date" label in the first block: the legacy fixed stride decides the blocks
+    block = ["Anna", "x", "y"] + [None] * (BLOCK_ROWS - 3) + [None]
+    col = TITLE + block + block
+    starts, ends, rows = index(col)
+    assert starts == [START_ROW, START_ROW + CHUNK_SIZE]
+    assert ends == [START_ROW + BLOCK_ROWS, START_ROW + CHUNK_SIZE + BLOCK_ROWS]
+    assert rows == [[-1] * 4, [-1] * 4]
+
+def test_nan_cells_count_as_blank():
+    col = TITLE + ["Anna"] + LABELED + [np.nan, "Ben"] + LABELED
+    starts, ends, _ = index(col)
+    assert starts == [2, 8]
+    assert ends == [7, 13]
+
+def test_empty_sheet():
+    assert index(TITLE) == ([], [], [])
+
+def test_blocks_from_rows():
+    # whole sheet rows in, one block per employee with its cells, labels and navigation lookups
+    col = TITLE + ["Anna"] + LABELED + [None, "Ben"] + LABELED
+    rows = [(v, "01" if v == "Date" else None, "02" if v == "Date" else None) for v in col]
+    blocks = list(blocks_from_rows(rows))
+    assert [b["name"] for b in blocks] == ["Anna", "Ben"]
+    assert [(b["start_row"], b["end_row"]) for b in blocks] == [(2, 7), (8, 13)]
+    assert blocks[0]["labels"] == {"date": 1, "in time": 2, "out time": 3, "total working hours": 4}
+    assert blocks[1]["chunk"].shape == (5, 3)
+    assert blocks[1]["chunk"][1].tolist() == ["Date", "01", "02"]
+    assert blocks[1]["dates"] == {"01": 1, "02": 2}
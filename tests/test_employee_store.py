@@ -0,0 +1,73 @@
+# test_employee_store.py
+# One-time import of the legacy employee_details.csv into SQLite, and the dict-like store API.
+
+import csv
+import pickle
+
+import pytest
+
+from employee_store import EmployeeStore
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["Employee Name", "Hourly Salary", "Shift Start", "Shift End"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+@pytest.fixture
+def legacy_csv(tmp_path):
+    path = tmp_path / "employee_details.csv"
+    write_csv(path, [
+        {"Employee Name": "Anna", "Hourly Salary": "12.5", "Shift Start": "09:00", "Shift End": "17:00"},
+        {"Employee Name": " Ben ", "Hourly Salary": "abc", "Shift Start": "22:00", "Shift End": "06:00"},
+        {"Employee Name": "", "Hourly Salary": "99", "Shift Start": "", "Shift End": ""},
+    ])
+    return str(path)
+
+def test_csv_migrated_on_first_open(tmp_path, legacy_csv):
+    store = EmployeeStore(str(tmp_path / "e.db"), csv_path=legacy_csv)
+    assert list(store) == ["Anna", "Ben"]  # names stripped, blank names skipped
+    assert store["Anna"] == {"Hourly Salary": 12.5, "Shift Start": "09:00", "Shift End": "17:00"}
+    assert store["Ben"]["Hourly Salary"] is None  # unparseable salary
+    store.close()
+
+def test_csv_migrated_only_once(tmp_path, legacy_csv):
+    db = str(tmp_path / "e.db")
+    store = EmployeeStore(db, csv_path=legacy_csv)
+    del store["Anna"]
+    store.close()
+    # later edits of the CSV (or records deleted in the app) are not imported again
+    write_csv(legacy_csv, [{"Employee Name": "Cara", "Hourly Salary": "10", "Shift Start": "", "Shift End": ""}])
+    store = EmployeeStore(db, csv_path=legacy_csv)
+    assert list(store) == ["Ben"]
+    store.close()
+
+def test_missing_csv_marks_migration_done(tmp_path):
+    db = str(tmp_path / "e.db")
+    missing = str(tmp_path / "employee_details.csv")
+    EmployeeStore(db, csv_path=missing).close()
+    write_csv(missing, [{"Employee Name": "Anna", "Hourly Salary": "10", "Shift Start": "", "Shift End": ""}])
+    store = EmployeeStore(db, csv_path=missing)
+    assert len(store) == 0
+    store.close()
+
+def test_mapping_api_and_bulk_lookups(tmp_path):
+    store = EmployeeStore(str(tmp_path / "e.db"))
+    store["Anna"] = {"Hourly Salary": "10", "Shift Start": "09:00", "Shift End": "17:00"}
+    store["Anna"] = {"Hourly Salary": 11, "Shift Start": "08:00", "Shift End": "16:00"}  # upsert
+    store["Ben"] = {"Hourly Salary": 9}
+    assert len(store) == 2 and "Anna" in store and "Zoe" not in store
+    assert store.hourly_rates({"Anna", "Ben", "Zoe"}) == {"Anna": 11.0, "Ben": 9.0}
+    assert store.shifts(["Anna", "Ben"]) == {"Anna": ("08:00", "16:00"), "Ben": ("", "")}
+    with pytest.raises(KeyError):
+        del store["Zoe"]
+    store.close()
+
+def test_pickled_store_reopens_database(tmp_path):
+    # batch workers receive the store by pickling; they reopen the same database file
+    store = EmployeeStore(str(tmp_path / "e.db"))
+    store["Anna"] = {"Hourly Salary": 10}
+    copy = pickle.loads(pickle.dumps(store))
+    assert copy["Anna"]["Hourly Salary"] == 10.0
+    copy.close()
+    store.close()
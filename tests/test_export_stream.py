@@ -0,0 +1,52 @@
+# test_export_stream.py
+# PDF table layout: headers and cells stay inside their columns.
+
+import pytest
+
+pytest.importorskip("reportlab")
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+import export_stream
+from shift_analytics import SHIFT_COLUMNS
+
+COLUMNS = ("Employee Name", "Total Monthly Hours", "Calculated Salary") + SHIFT_COLUMNS
+
+class RecordingCanvas(canvas.Canvas):
+    # keeps (left, right, text) of every string drawn below the page title
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spans = []
+
+    def drawString(self, x, y, text, *args, **kwargs):
+        self.spans.append((x, x + stringWidth(text, self._fontname, self._fontsize), text))
+        super().drawString(x, y, text, *args, **kwargs)
+
+    def drawRightString(self, x, y, text, *args, **kwargs):
+        self.spans.append((x - stringWidth(text, self._fontname, self._fontsize), x, text))
+        super().drawRightString(x, y, text, *args, **kwargs)
+
+def test_text_fits_columns(tmp_path, monkeypatch):
+    drawn = []
+    monkeypatch.setattr(canvas, "Canvas", lambda *a, **k: drawn.append(RecordingCanvas(*a, **k)) or drawn[-1])
+    row = {"Employee Name": "Maximilian Alexander Bartholomew-Featherstonehaugh", "Total Monthly Hours": 182.5,
+           "Calculated Salary": 123456.78, "Late Minutes": 35.0, "Early Departure Minutes": 12.0,
+           "Overtime Minutes": 400.0, "Overnight Days": 2.0}
+    assert export_stream.write_pdf(iter([row] * 3), str(tmp_path / "t.pdf"), columns=COLUMNS) == 3
+    w = drawn[0]._pagesize[0]
+    col_w = (w - 80) / len(COLUMNS)
+    cells = [s for s in drawn[0].spans if s[2] not in ("Salary Record", "Page 1")]
+    for left, right, text in cells:
+        i = int((left - 40) // col_w)
+        assert 40 + i * col_w <= left and right <= 40 + (i + 1) * col_w, text
+    texts = [t for _, _, t in cells]
+    assert "Early Departure" in texts and "Minutes" in texts  # header wrapped, not cut
+    assert any(t.startswith("Maximilian") and t.endswith("…") for t in texts)
+
+def test_fit_and_header_fallback():
+    assert export_stream._fit("short", "Helvetica", 10, 100) == "short"
+    cut = export_stream._fit("a much longer employee name", "Helvetica", 10, 60)
+    assert cut.endswith("…") and stringWidth(cut, "Helvetica", 10) <= 60
+    size, headers = export_stream._header_lines(["Early Departure Minutes Total"], 40)
+    assert size == 7 and len(headers[0]) == 2
+    assert all(stringWidth(l, "Helvetica-Bold", 7) <= 40 for l in headers[0])
@@ -0,0 +1,101 @@
+# test_payroll_engine.py
+# The vectorized payroll against the original per-employee loop, and payroll_from_minutes on its own.
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from payroll_engine import HOURS_PER_DAY, compute_payroll_blocks, payroll_from_minutes
+from sample_workbook import employee_rows
+from workbook_stream import blocks_from_rows
+
+def original_loop(rows, calc_method, num_sundays, num_holidays, employee_details):
+    # the pre-vectorization process_excel loop (fixed 22+1 stride, pandas parsing per cell), kept as the reference
+    raw = pd.DataFrame(rows)
+    results = []
+    for i in range(2, len(raw), 23):
+        chunk = raw.iloc[i:min(i + 22, len(raw))].reset_index(drop=True)
+        name = str(chunk.iloc[0, 0]).strip()
+        labels = chunk.iloc[:, 0].astype(str).str.strip().str.lower()
+        in_rows, out_rows, total_rows = chunk[labels == "in time"], chunk[labels == "out time"], chunk[labels == "total working hours"]
+        seconds = 0.0
+        if calc_method == "1" and not in_rows.empty and not out_rows.empty:
+            for in_val, out_val in zip(in_rows.iloc[0, 1:].dropna(), out_rows.iloc[0, 1:].dropna()):
+                if str(in_val).strip() in ("", "00:00", "0") or str(out_val).strip() in ("", "00:00", "0"):
+                    continue
+                in_dt, out_dt = pd.to_datetime(str(in_val), errors="coerce"), pd.to_datetime(str(out_val), errors="coerce")
+                if pd.isna(in_dt) or pd.isna(out_dt):
+                    continue
+                delta = (out_dt - in_dt).total_seconds()
+                if delta > 0:
+                    seconds += delta
+        elif not total_rows.empty:
+            for v in total_rows.iloc[0, 1:].dropna().astype(str):
+                h, m = v.split(":")
+                seconds += float(h) * 3600 + float(m) * 60
+        hours = seconds / 3600.0 + (num_sundays + num_holidays) * HOURS_PER_DAY
+        try:
+            rate = float(employee_details[name].get("Hourly Salary", 0)) if name in employee_details else 0.0
+        except Exception:
+            rate = 0.0
+        results.append({"Employee Name": name, "Total Monthly Hours": hours, "Calculated Salary": hours * rate})
+    return results
+
+@pytest.fixture
+def sheet():
+    rng = random.Random(7)
+    rows = [("Monthly Attendance Report",), (None,)]
+    for i in range(12):
+        block = employee_rows(f"Emp {i}", 31, rng, blank=0.1, malformed=0.0)
+        if i == 5:
+            block = [r for r in block if r[0] not in ("In Time", "Out Time")]  # falls back to Total Working Hours
+            block += [[None]] * (22 - len(block))
+        rows.extend(tuple(r) for r in block)
+        rows.append((None,))
+    return rows
+
+DETAILS = {"Emp 0": {"Hourly Salary": 10}, "Emp 1": {"Hourly Salary": "12.5"}, "Emp 2": {"Hourly Salary": "n/a"}, "Emp 5": {"Hourly Salary": 8}}
+
+@pytest.mark.parametrize("calc_method", ["1", "2"])
+def test_matches_original_loop(sheet, calc_method):
+    expected = original_loop(sheet, calc_method, 4, 1, DETAILS)
+    got = compute_payroll_blocks(blocks_from_rows(sheet), 31, 4, 1, calc_method, DETAILS, batch_size=5)
+    assert [r["Employee Name"] for r in got] == [r["Employee Name"] for r in expected]
+    for g, e in zip(got, expected):
+        assert g["Total Monthly Hours"] == pytest.approx(e["Total Monthly Hours"])
+        assert g["Calculated Salary"] == pytest.approx(e["Calculated Salary"])
+
+def test_progress_reports_per_batch(sheet):
+    seen = []
+    compute_payroll_blocks(blocks_from_rows(sheet), 31, 0, 0, "2", {}, batch_size=5, progress=seen.append)
+    assert seen == [5, 10, 12]
+
+def test_payroll_from_minutes_methods_and_shift_columns():
+    names = ["Day", "Night", "NoShift", "NoPunches"]
+    ins = np.array([[540, 560], [1320, 1320], [540, 540], [np.nan, np.nan]], dtype=float)
+    outs = np.array([[1080, 1100], [360, 400], [1020, 1020], [np.nan, np.nan]], dtype=float)
+    total = np.array([[480, 480], [480, 480], [480, 480], [450, 450]], dtype=float)
+    has_punches = np.array([True, True, True, False])
+    details = {
+        "Day": {"Hourly Salary": 10, "Shift Start": "09:00", "Shift End": "18:00"},
+        "Night": {"Hourly Salary": 20, "Shift Start": "22:00", "Shift End": "06:00"},
+        "NoShift": {"Hourly Salary": 5},
+    }
+    by_in_out = {r["Employee Name"]: r for r in payroll_from_minutes(names, total, ins, outs, has_punches, 1, 0, "1", details)}
+    by_total = {r["Employee Name"]: r for r in payroll_from_minutes(names, total, ins, outs, has_punches, 1, 0, "2", details)}
+
+    assert by_in_out["Day"]["Total Monthly Hours"] == pytest.approx(18 + HOURS_PER_DAY)
+    assert by_in_out["Night"]["Total Monthly Hours"] == pytest.approx(8 + 8 + 40 / 60 + HOURS_PER_DAY)
+    assert by_in_out["Night"]["Calculated Salary"] == pytest.approx(by_in_out["Night"]["Total Monthly Hours"] * 20)
+    # without In/Out rows method 1 falls back to Total Working Hours
+    assert by_in_out["NoPunches"]["Total Monthly Hours"] == pytest.approx(15 + HOURS_PER_DAY)
+    assert by_total["Day"]["Total Monthly Hours"] == pytest.approx(16 + HOURS_PER_DAY)
+
+    assert by_in_out["Day"]["Late Minutes"] == 20 and by_in_out["Day"]["Overtime Minutes"] == 0
+    assert by_in_out["Night"]["Overnight Days"] == 2 and by_in_out["Night"]["Overtime Minutes"] == 40
+    for name in ("NoShift", "NoPunches"):
+        assert all(by_in_out[name][c] is None for c in ("Late Minutes", "Early Departure Minutes", "Overtime Minutes", "Overnight Days"))
+    # the shift columns do not depend on the calculation method
+    assert by_total["Night"]["Overnight Days"] == 2
@@ -0,0 +1,52 @@
+# test_service_client.py
+# Error answers of the payroll service: a busy service is treated like an unreachable one.
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import service_client
+
+class FixedAnswer(BaseHTTPRequestHandler):
+    status = 503
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = json.dumps({"error": "busy; try again shortly"}).encode()
+        self.send_response(self.status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def service():
+    servers = []
+    def start(status):
+        handler = type("Handler", (FixedAnswer,), {"status": status})
+        server = HTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_busy_service_raises_oserror(service, tmp_path):
+    path = tmp_path / "month.xlsx"
+    path.write_bytes(b"xlsx")
+    with pytest.raises(OSError) as err:
+        service_client.payroll(service(503), str(path), (1, 30, 4, 0))
+    assert isinstance(err.value, service_client.ServiceBusy)
+
+def test_other_errors_are_not_oserror(service, tmp_path):
+    path = tmp_path / "month.xlsx"
+    path.write_bytes(b"xlsx")
+    with pytest.raises(service_client.ServiceError) as err:
+        service_client.payroll(service(400), str(path), (1, 30, 4, 0))
+    assert not isinstance(err.value, OSError)
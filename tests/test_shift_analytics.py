@@ -0,0 +1,65 @@
+# test_shift_analytics.py
+# Shift compliance totals, and their agreement with the hours punch_hours credits.
+
+import numpy as np
+import pytest
+
+from payroll_engine import punch_hours
+from shift_analytics import SHIFT_COLUMNS, compliance, shift_bounds
+
+NAN = np.nan
+
+def minutes(*clock):
+    # "HH:MM" strings (or None) -> one row of minutes
+    return np.array([[NAN if c is None else int(c[:2]) * 60 + int(c[3:]) for c in clock]], dtype=float)
+
+def one(ins, outs, start, end):
+    result = compliance(minutes(*ins), minutes(*outs), minutes(start)[0], minutes(end)[0])
+    return {c: result[c][0] for c in SHIFT_COLUMNS}
+
+def test_day_shift():
+    # 09:10-17:30 and 08:50-18:40 on a 09:00-18:00 shift
+    r = one(["09:10", "08:50"], ["17:30", "18:40"], "09:00", "18:00")
+    assert r == {"Late Minutes": 10, "Early Departure Minutes": 30, "Overtime Minutes": 50, "Overnight Days": 0}
+
+def test_night_shift_crosses_midnight():
+    # 22:15-06:30 on a 22:00-06:00 shift, plus an In after midnight (00:30 counts as 150 minutes late)
+    r = one(["22:15", "00:30"], ["06:30", "06:00"], "22:00", "06:00")
+    assert r["Late Minutes"] == 15 + 150
+    assert r["Early Departure Minutes"] == 0
+    assert r["Overtime Minutes"] == 15
+    assert r["Overnight Days"] == 1
+
+def test_out_before_in_on_day_shift_is_ignored():
+    # a mistyped Out (08:00 against In 09:00) earns no hours, so it is neither early, overtime nor overnight
+    r = one(["09:00"], ["08:00"], "09:00", "18:00")
+    assert r == {"Late Minutes": 0, "Early Departure Minutes": 0, "Overtime Minutes": 0, "Overnight Days": 0}
+    assert punch_hours(minutes("09:00"), minutes("08:00"), overnight=np.array([False]))[0] == 0
+
+def test_missing_punches_and_zero_are_skipped():
+    r = one(["09:30", None, "00:00"], [None, "17:00", "18:00"], "09:00", "18:00")
+    assert r == {"Late Minutes": 30, "Early Departure Minutes": 60, "Overtime Minutes": 0, "Overnight Days": 0}
+
+@pytest.mark.parametrize("start, end", [(None, None), ("09:00", None), ("09:00", "09:00")])
+def test_no_usable_shift_is_nan(start, end):
+    r = one(["09:30"], ["17:00"], start, end)
+    assert all(np.isnan(v) for v in r.values())
+
+def test_compliance_agrees_with_credited_hours():
+    ins = np.vstack([minutes("09:00", "22:00", "09:00"), minutes("22:00", "22:00", "21:00")])
+    outs = np.vstack([minutes("19:00", "06:00", "08:00"), minutes("07:00", "05:00", "06:00")])
+    start, end = np.array([540.0, 1320.0]), np.array([1080.0, 360.0])
+    shift = compliance(ins, outs, start, end)
+    hours = punch_hours(ins, outs, overnight=end < start)
+    # day shift: only 09:00-19:00 is a valid pair (22:00-06:00 and 09:00-08:00 run backwards)
+    assert hours[0] == 10
+    assert shift["Overtime Minutes"][0] == 60 and shift["Overnight Days"][0] == 0
+    # night shift: all three nights are paired across midnight
+    assert hours[1] == 9 + 7 + 9
+    assert shift["Overtime Minutes"][1] == 60 + 60 and shift["Overnight Days"][1] == 3
+
+def test_shift_bounds_from_dict():
+    details = {"Anna": {"Shift Start": "09:00", "Shift End": "17:30"}, "Ben": {"Shift Start": "", "Shift End": ""}}
+    start, end = shift_bounds(["Anna", "Ben", "Cara"], details)
+    assert start[0] == 540 and end[0] == 1050
+    assert np.isnan(start[1:]).all() and np.isnan(end[1:]).all()
@@ -0,0 +1,81 @@
+# test_time_parser.py
+# Punch (clock) vs Total Working Hours (duration) parsing and the parse counters.
+
+import math
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pytest
+
+import time_parser
+from time_parser import clock_minutes, detect_format, duration_minutes, parse_matrix
+
+@pytest.fixture(autouse=True)
+def fresh_counters():
+    time_parser.reset_counters()
+    yield
+    time_parser.reset_counters()
+
+@pytest.mark.parametrize("value, minutes", [
+    ("08:30", 510.0),
+    (" 17:45:30 ", 17 * 60 + 45.5),
+    ("9:00 AM", 540.0),
+    ("2026-01-05 22:15", 1335.0),
+    (0.5, 720.0),                       # Excel day fraction
+    (45000.25, 360.0),                  # Excel serial date + fraction
+    (time(6, 15), 375.0),
+    (datetime(2026, 1, 5, 23, 0), 1380.0),
+])
+def test_clock_values(value, minutes):
+    assert clock_minutes(value) == pytest.approx(minutes)
+
+@pytest.mark.parametrize("value", ["25:99", "24:00", "12:60", "10:30:60", "-1:00", "absent", "9.75.00", "", None, float("nan")])
+def test_clock_rejects_non_times(value):
+    assert math.isnan(clock_minutes(value))
+
+@pytest.mark.parametrize("value, minutes", [
+    ("08:30", 510.0),
+    ("25:99", 1599.0),                  # durations may exceed a day
+    ("-1:00", -60.0),
+    ("7.5", 450.0),                     # plain numbers are hours
+    (8, 480.0),
+    ("1 days 02:00:00", 1560.0),
+    (timedelta(hours=9, minutes=15), 555.0),
+])
+def test_duration_values(value, minutes):
+    assert duration_minutes(value) == pytest.approx(minutes)
+
+def test_duration_unparseable():
+    assert math.isnan(duration_minutes("--"))
+
+@pytest.mark.parametrize("value, kind", [
+    (None, "empty"), ("  ", "empty"), (float("nan"), "empty"), ("08:30", "hh:mm"), ("08:30:15", "hh:mm:ss"),
+    (0.25, "excel"), (7.5, "number"), ("7.5", "number"), (time(8), "time"), (datetime(2026, 1, 1), "datetime"),
+    (timedelta(hours=1), "timedelta"), ("absent", "text"),
+])
+def test_detect_format(value, kind):
+    assert detect_format(value) == kind
+
+def test_parse_matrix_and_counters():
+    cells = np.array([["08:00", "25:99", None], ["08:00", "", "absent"]], dtype=object)
+    minutes = parse_matrix(cells)
+    assert minutes.shape == (2, 3)
+    assert minutes[0, 0] == minutes[1, 0] == 480.0
+    assert np.isnan(minutes[0, 1:]).all() and np.isnan(minutes[1, 1:]).all()
+    # failures are counted per cell; None and blank strings are empty, not failed
+    assert time_parser.get_counters() == {"cells": 6, "empty": 2, "failed": 2}
+
+def test_parse_matrix_duration_keeps_long_values():
+    minutes = parse_matrix(np.array([["25:99", "8"]], dtype=object), duration=True)
+    assert minutes.tolist() == [[1599.0, 480.0]]
+    assert time_parser.get_counters()["failed"] == 0
+
+def test_parse_matrix_empty():
+    assert parse_matrix(np.empty((0, 5), dtype=object)).shape == (0, 5)
+    assert time_parser.get_counters()["cells"] == 0
+
+def test_reset_counters():
+    parse_matrix(np.array([["x"]], dtype=object))
+    assert time_parser.get_counters()["failed"] == 1
+    time_parser.reset_counters()
+    assert time_parser.get_counters() == {"cells": 0, "empty": 0, "failed": 0}
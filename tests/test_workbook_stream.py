@@ -0,0 +1,79 @@
+# test_workbook_stream.py
+# Targeted write-back of edited cells: only those cells change, formulas keep their computed values.
+
+import zipfile
+
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+
+from workbook_stream import iter_sheet_rows, patch_cells
+
+def with_cached_value(path, ref, value):
+    # openpyxl writes formulas without a computed value; add one the way Excel stores it
+    with zipfile.ZipFile(path) as z:
+        members = {i.filename: z.read(i.filename) for i in z.infolist()}
+    sheet = members["xl/worksheets/sheet1.xml"]
+    start = sheet.index(b'<c r="%s"' % ref.encode())
+    end = sheet.index(b"</f>", start) + len(b"</f>")
+    members["xl/worksheets/sheet1.xml"] = sheet[:end] + b"<v>%s</v>" % str(value).encode() + sheet[end:]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in members.items():
+            z.writestr(name, data)
+
+@pytest.fixture
+def attendance(tmp_path):
+    path = str(tmp_path / "month.xlsx")
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "March"
+    ws.append(["Monthly Report"])
+    ws.append([])
+    ws.append(["Emp 0"])
+    ws.append(["In Time", "09:00", "09:15"])
+    ws.append(["Out Time", "17:00", "18:00"])
+    ws.append(["Total Working Hours", 8, 8.75, "=B6+C6"])
+    ws["B4"].font = Font(bold=True)
+    wb.create_sheet("Notes").append(["keep me"])
+    wb.save(path)
+    with_cached_value(path, "D6", 16.75)
+    return path
+
+def test_edits_only_touch_their_cells(attendance):
+    patch_cells(attendance, {(3, 1): "07:00", (4, 2): "", (6, 1): "new row"})
+    rows = list(iter_sheet_rows(attendance))
+    assert rows[3] == ("In Time", "07:00", "09:15", None)
+    assert rows[4] == ("Out Time", "17:00", None, None)
+    assert rows[6][:2] == (None, "new row")
+    wb = load_workbook(attendance)
+    assert wb["March"]["B4"].font.b  # cell style kept
+    assert wb["Notes"]["A1"].value == "keep me"
+
+def test_formula_values_survive(attendance):
+    patch_cells(attendance, {(3, 1): "07:00"})
+    assert list(iter_sheet_rows(attendance))[5][3] == 16.75
+    assert load_workbook(attendance)["March"]["D6"].value == "=B6+C6"
+    with zipfile.ZipFile(attendance) as z:
+        assert b'fullCalcOnLoad="1"' in z.read("xl/workbook.xml")
+
+def test_edits_outside_used_range_and_by_sheet_name(attendance):
+    patch_cells(attendance, {(9, 5): 7.5, (0, 3): "a<b&c"}, sheet="March")
+    rows = list(iter_sheet_rows(attendance, "March"))
+    assert len(rows) == 10 and rows[9][5] == 7.5
+    assert rows[0][3] == "a<b&c"
+
+def test_replacing_a_formula_drops_the_calc_chain(attendance):
+    with zipfile.ZipFile(attendance) as z:
+        members = {i.filename: z.read(i.filename) for i in z.infolist()}
+    members["xl/calcChain.xml"] = b'<calcChain xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><c r="D6" i="1"/></calcChain>'
+    members["[Content_Types].xml"] = members["[Content_Types].xml"].replace(
+        b"</Types>", b'<Override PartName="/xl/calcChain.xml" ContentType="application/vnd.openxmlformats-officedocument.'
+                     b'spreadsheetml.calcChain+xml"/></Types>')
+    with zipfile.ZipFile(attendance, "w") as z:
+        for name, data in members.items():
+            z.writestr(name, data)
+    patch_cells(attendance, {(5, 3): 20})
+    with zipfile.ZipFile(attendance) as z:
+        assert "xl/calcChain.xml" not in z.namelist()
+        assert b"calcChain" not in z.read("[Content_Types].xml")
+    assert load_workbook(attendance)["March"]["D6"].value == 20
@@ -0,0 +1,154 @@
+# time_parser.py
+# Fast parsing of attendance time cells (In/Out punches and Total Working Hours) into minutes.
+# Requirements: numpy, pandas
+
+import threading
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+# pandas is imported inside the functions that need it, so importing this module stays cheap
+
+CACHE_SIZE = 4096  # distinct string values memoized per kind (clock / duration)
+
+# running totals since the last reset_counters(): cells seen, empty cells, non-empty cells that failed
+counters = {"cells": 0, "empty": 0, "failed": 0}
+_counters_lock = threading.Lock()
+
+# ---------- Format detection ----------
+
+def detect_format(v):
+    """
+    Classifies a cell as one of: "empty", "hh:mm", "hh:mm:ss", "excel" (day fraction / serial),
+    "number", "time", "datetime", "timedelta" or "text".
+    """
+    if v is None:
+        return "empty"
+    if isinstance(v, datetime):
+        return "datetime"
+    if isinstance(v, time):
+        return "time"
+    if isinstance(v, timedelta):
+        return "timedelta"
+    if isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool):
+        if np.isnan(v):
+            return "empty"
+        return "excel" if 0 <= v < 1 else "number"
+    s = str(v).strip()
+    if not s:
+        return "empty"
+    parts = s.split(":")
+    if len(parts) in (2, 3) and all(p.strip().isdigit() for p in parts):
+        return "hh:mm" if len(parts) == 2 else "hh:mm:ss"
+    try:
+        float(s)
+        return "number"
+    except ValueError:
+        return "text"
+
+# ---------- Scalar parsers ----------
+
+def _split_clock(s, clock=False):
+    # None when s is not h:mm[:ss]; with clock=True a value that is no time of day (25:99, -1:00) is NaN
+    parts = s.split(":")
+    if 2 <= len(parts) <= 3:
+        try:
+            nums = [float(p) for p in parts]
+        except ValueError:
+            return None
+        if clock and (min(nums) < 0 or nums[0] >= 24 or max(nums[1:]) >= 60):
+            return np.nan
+        return nums[0] * 60 + nums[1] + (nums[2] / 60.0 if len(nums) == 3 else 0.0)
+    return None
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _clock_str(s):
+    s = s.strip()
+    if not s:
+        return np.nan
+    minutes = _split_clock(s, clock=True)
+    if minutes is not None:
+        return minutes
+    # rare free-form values such as "9:00 AM" or full timestamps
+    import pandas as pd
+    ts = pd.to_datetime(s, errors="coerce")
+    if pd.isna(ts):
+        return np.nan
+    return ts.hour * 60 + ts.minute + ts.second / 60.0
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _duration_str(s):
+    s = s.strip()
+    if not s:
+        return np.nan
+    try:
+        return float(s) * 60.0  # plain number of hours
+    except ValueError:
+        pass
+    minutes = _split_clock(s)
+    if minutes is not None:
+        return minutes
+    import pandas as pd
+    try:
+        return pd.to_timedelta(s).total_seconds() / 60.0
+    except (ValueError, TypeError):
+        return np.nan
+
+def clock_minutes(v):
+    """Time of day of a punch cell in minutes after midnight, NaN when empty or unparseable."""
+    if v is None:
+        return np.nan
+    if isinstance(v, (datetime, time)):
+        return v.hour * 60 + v.minute + v.second / 60.0
+    if isinstance(v, timedelta):
+        return v.total_seconds() / 60.0
+    if isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool):
+        # Excel stores times as day fractions (and datetimes as serial + fraction)
+        return np.nan if np.isnan(v) else (float(v) % 1.0) * 1440.0
+    return _clock_str(str(v))
+
+def duration_minutes(v):
+    """Length of a Total Working Hours cell in minutes; plain numbers are hours."""
+    if isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool):
+        return np.nan if np.isnan(v) else float(v) * 60.0
+    if isinstance(v, str):
+        return _duration_str(v)
+    return clock_minutes(v)
+
+# ---------- Batch parsing ----------
+
+def parse_matrix(matrix, duration=False):
+    """
+    Parses an object matrix (e.g. employees x days) into a float matrix of minutes, NaN where empty/unparseable.
+    Each distinct value is parsed once per call and string values are memoized across calls.
+    """
+    matrix = np.asarray(matrix, dtype=object)
+    if matrix.size == 0:
+        return np.full(matrix.shape, np.nan)
+    import pandas as pd
+    codes, uniques = pd.factorize(matrix.ravel(), use_na_sentinel=True)
+    parse = duration_minutes if duration else clock_minutes
+    parsed = np.array([parse(u) for u in uniques] + [np.nan], dtype=float)
+    # count failures per cell, not per distinct value
+    occurrences = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    blank = np.array([detect_format(u) == "empty" for u in uniques], dtype=bool)
+    failed = int(occurrences[np.isnan(parsed[:-1]) & ~blank].sum())
+    empty = int((codes < 0).sum() + occurrences[blank].sum())
+    with _counters_lock:
+        counters["cells"] += int(matrix.size)
+        counters["empty"] += empty
+        counters["failed"] += failed
+    return parsed[codes].reshape(matrix.shape)
+
+def get_counters():
+    with _counters_lock:
+        return dict(counters)
+
+def reset_counters():
+    with _counters_lock:
+        for k in counters:
+            counters[k] = 0
+
+def cache_info():
+    return {"clock": _clock_str.cache_info(), "duration": _duration_str.cache_info()}
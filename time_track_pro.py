@@ -1,36 +1,128 @@
 # time_track_pro_fixed.py
 # Requirements: pandas, openpyxl, reportlab (optional for PDF saving)
 # pip install pandas openpyxl reportlab
+# Importing this module has no side effects (no window, no database); the GUI starts in main().
+# The computation lives in Tk-free modules (payroll_engine, workbook_stream, ...) that workers import directly.
+# tkinter is only imported when the GUI starts, so "batch" and "serve" also run on hosts without Tk.
 
 import os
-import pandas as pd
-import tkinter as tk
-from tkinter import filedialog, messagebox, simpledialog, ttk
-from datetime import datetime, timedelta
+import queue
+import sys
+import threading
+from payroll_runner import run_payroll
+from shift_analytics import SHIFT_COLUMNS
+from workbook_stream import estimate_blocks, patch_cells
+import workbook_cache
+import month_store
+import punch_log
+import batch_cli
+import export_stream
+import profiler
+import service_client
+from employee_store import EmployeeStore
+
+# tkinter modules and the Tk-based VirtualTable, bound in main() when the GUI starts
+tk = filedialog = messagebox = simpledialog = ttk = VirtualTable = None
 
 # ---------- Config & Storage ----------
-employee_file = "employee_details.csv"
-employee_details = {}  # loaded from file
+employee_file = "employee_details.csv"  # legacy store, imported into the database on first run
+employee_db = "employee_details.db"
+employee_details = None  # opened on first use, see get_employee_details()
+# e.g. http://127.0.0.1:8765 to hand full payroll runs to a running payroll service (python -m time_track_pro serve)
+service_url = os.environ.get("TIMETRACK_SERVICE_URL") or None
+_employee_lock = threading.Lock()
 
 def load_employee_details():
-    if os.path.exists(employee_file):
-        try:
-            df = pd.read_csv(employee_file)
-            if "Employee Name" in df.columns:
-                return df.set_index("Employee Name").to_dict("index")
-        except Exception:
-            return {}
-    return {}
+    return EmployeeStore(employee_db, csv_path=employee_file)
 
-def save_employee_details():
+def get_employee_details():
+    # the store is opened (and the legacy CSV migrated) the first time anything needs it
     global employee_details
+    with _employee_lock:
+        if employee_details is None:
+            employee_details = load_employee_details()
+        return employee_details
+
+def save_employee_details(name, record):
+    # a single-row upsert; the rest of the store is untouched
     try:
-        df = pd.DataFrame.from_dict(employee_details, orient="index").reset_index().rename(columns={"index":"Employee Name"})
-        df.to_csv(employee_file, index=False)
+        get_employee_details()[name] = record
+        return True
     except Exception as e:
         messagebox.showerror("Error", f"Failed to save employee details:\n{e}")
+        return False
+
+# main-window widgets, created in main()
+root = result_table = save_btn = payslip_btn = print_btn = profiling_var = None
+
+# ---------- Background jobs ----------
+class JobCancelled(Exception):
+    pass
+
+def run_in_background(title, work, on_done, error_text, unit="employees"):
+    """
+    Runs work(progress) on a worker thread behind a small progress window with a Cancel button.
+    The worker reports progress(done, total); progress, the result and errors are passed back through
+    a queue that the Tk thread polls with root.after, so on_done(result) and all dialogs run on the Tk thread.
+    """
+    events = queue.Queue()
+    cancel = threading.Event()
+
+    win = tk.Toplevel(root)
+    win.title(title)
+    win.geometry("380x130")
+    win.transient(root)
+    status = tk.Label(win, text="Starting...")
+    status.pack(pady=8)
+    bar = ttk.Progressbar(win, length=340, mode="determinate")
+    bar.pack(pady=4)
+    tk.Button(win, text="Cancel", command=cancel.set).pack(pady=6)
+    win.protocol("WM_DELETE_WINDOW", cancel.set)
+    win.grab_set()
+
+    def progress(done, total=None):
+        # called on the worker thread; also the point where a requested cancel takes effect
+        if cancel.is_set():
+            raise JobCancelled()
+        events.put(("progress", (done, total)))
+
+    def worker():
+        try:
+            with profiler.thread_profile():
+                result = work(progress)
+            events.put(("done", result))
+        except JobCancelled:
+            events.put(("cancelled", None))
+        except Exception as e:
+            events.put(("error", e))
+
+    def poll():
+        try:
+            while True:
+                kind, payload = events.get_nowait()
+                if kind == "progress":
+                    done, total = payload
+                    if total:
+                        bar.config(maximum=total, value=min(done, total))
+                        status.config(text=f"Processed {done} of {total} {unit}")
+                    else:
+                        status.config(text=f"Processed {done} {unit}")
+                    continue
+                win.grab_release()
+                win.destroy()
+                if kind == "done":
+                    on_done(payload)
+                elif kind == "error":
+                    messagebox.showerror("Error", f"{error_text}:\n{payload}")
+                else:
+                    messagebox.showinfo("Cancelled", f"{title} was cancelled.")
+                return
+        except queue.Empty:
+            pass
+        root.after(100, poll)
 
-employee_details = load_employee_details()
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(100, poll)
 
 # ---------- Helper functions & core logic ----------
 
@@ -38,31 +130,42 @@ def upload_file():
     file_path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx;*.xls")])
     if not file_path:
         return
-    try:
-        # Read the first sheet as a DataFrame
-        sheet_data = pd.read_excel(file_path, sheet_name=0, header=None, engine="openpyxl")
-        # Use the chunk scheme you used: every employee info is 22 rows + 1 blank row (chunk_size=23)
-        chunk_size = 23
-        start_row = 2  # data starts from row index 2 (0-based)
-        employee_chunks = []
-        for i in range(start_row, len(sheet_data), chunk_size):
-            end_row = min(i + 22, len(sheet_data))
-            chunk = sheet_data.iloc[i:end_row].copy().reset_index(drop=True)
-            # employee name typically in first cell of the chunk row 0 col0
-            try:
-                employee_name = str(chunk.iloc[0, 0]).strip()
-            except Exception:
-                employee_name = f"Employee_{i}"
-            employee_chunks.append({"name": employee_name, "chunk": chunk, "start_row": i, "end_row": end_row})
+    # Stream the first sheet one employee block at a time; blocks are located from their Date / In Time /
+    # Out Time labels (block_index). The blocks are shared with the edit write-back and process_excel.
+    def load(progress):
+        total = estimate_blocks(file_path)
+        return workbook_cache.load_blocks(file_path, progress=lambda done: progress(done, total))
+
+    def loaded(employee_chunks):
         if not employee_chunks:
             messagebox.showerror("Error", "No employee chunks found in the selected file. Check file format.")
             return
-        display_navigation_window(employee_chunks, file_path, sheet_data)
-    except Exception as e:
-        messagebox.showerror("Error", f"An error occurred while loading the file:\n{e}")
+        display_navigation_window(employee_chunks, file_path)
+
+    run_in_background("Loading workbook", load, loaded, "An error occurred while loading the file")
+
+def upload_punch_log():
+    # raw terminal export (employee id, timestamp per line) instead of the 23-row workbook layout
+    file_path = filedialog.askopenfilename(filetypes=[("Punch logs", "*.csv;*.txt")])
+    if not file_path:
+        return
+    params = ask_month_params()
+    if params is None:
+        return
+
+    def work(progress):
+        return punch_log.process_punch_log(file_path, params, get_employee_details(), progress=lambda n: progress(n, None))
+
+    def done(results):
+        if results:
+            display_results(results)
+        else:
+            messagebox.showinfo("Info", "No punch events found in the selected file.")
+
+    run_in_background("Processing punch log", work, done, "Failed to process punch log", unit="events")
 
 # ---------- Navigation window (editing) ----------
-def display_navigation_window(employee_chunks, file_path, original_sheet_df):
+def display_navigation_window(employee_chunks, file_path):
     navigation_window = tk.Toplevel(root)
     navigation_window.title("Employee Details Navigation")
     navigation_window.geometry("700x500")
@@ -83,6 +186,8 @@ def display_navigation_window(employee_chunks, file_path, original_sheet_df):
 
     # store edits: dict of emp_index -> {date_str: {"In Time": val, "Out Time": val}}
     edited_data = {}
+    # sheet cells to patch on write-back: {(row, col): value}
+    cell_edits = {}
 
     def show_employee(idx):
         if idx < 0 or idx >= len(employee_chunks):
@@ -92,28 +197,16 @@ def display_navigation_window(employee_chunks, file_path, original_sheet_df):
         chunk = emp["chunk"]
         employee_name = emp["name"]
         navigation_window.title(f"Employee: {employee_name} ({idx+1}/{len(employee_chunks)})")
-        # find rows labeled 'Date', 'In Time', 'Out Time' in first column of chunk
         table.delete(*table.get_children())
         try:
-            date_row = chunk[chunk.iloc[:, 0].astype(str).str.strip().str.lower() == "date"]
-            in_row = chunk[chunk.iloc[:, 0].astype(str).str.strip().str.lower() == "in time"]
-            out_row = chunk[chunk.iloc[:, 0].astype(str).str.strip().str.lower() == "out time"]
-            if date_row.empty or in_row.empty or out_row.empty:
-                # fallback: try to read first row as dates and second/third as in/out if labeled differently
-                # Here we try to display first 20 columns
-                row0 = chunk.iloc[0, :20].astype(str).fillna("")
-                row1 = chunk.iloc[1, :20].astype(str).fillna("")
-                row2 = chunk.iloc[2, :20].astype(str).fillna("")
-                dates = row0[row0 != ""].values
-                ins = row1[row1 != ""].values
-                outs = row2[row2 != ""].values
-            else:
-                dates = date_row.iloc[0, 1:].dropna().values
-                ins = in_row.iloc[0, 1:].dropna().values
-                outs = out_row.iloc[0, 1:].dropna().values
-            # insert into table
-            for d, it, ot in zip(dates, ins, outs):
-                table.insert("", "end", values=(str(d), str(it), str(ot)))
+            # Date / In Time / Out Time rows and the date columns were indexed when the file was loaded
+            # (unlabeled blocks fall back to the first three rows)
+            in_row_i = emp["rows"]["in time"]
+            out_row_i = emp["rows"]["out time"]
+            for d, col in emp["dates"].items():
+                it = chunk[in_row_i, col] if in_row_i < len(chunk) else None
+                ot = chunk[out_row_i, col] if out_row_i < len(chunk) else None
+                table.insert("", "end", values=(d, "" if it is None else str(it), "" if ot is None else str(ot)))
         except Exception:
             messagebox.showwarning("Warning", "Could not parse this employee chunk. It may have an unexpected format.")
 
@@ -146,64 +239,67 @@ def display_navigation_window(employee_chunks, file_path, original_sheet_df):
         edited_data[idx][date] = {"In Time": new_vals[1], "Out Time": new_vals[2]}
 
     def apply_edits_to_original():
-        # For each edited chunk, write back the changed values into original_sheet_df
-        nonlocal original_sheet_df
+        # For each edited chunk, write the changed values into the block and queue the sheet cells
+        def put(emp, row_i, col, value):
+            emp["chunk"][row_i, col] = value
+            cell_edits[(emp["start_row"] + row_i, col)] = value
         for emp_idx, changes in edited_data.items():
             emp = employee_chunks[emp_idx]
-            chunk = emp["chunk"]
-            start = emp["start_row"]
-            # Find column indices that correspond to dates (first row labeled 'Date' expected)
-            try:
-                date_row_idx = chunk[chunk.iloc[:,0].astype(str).str.strip().str.lower()=="date"].index
-                in_row_idx = chunk[chunk.iloc[:,0].astype(str).str.strip().str.lower()=="in time"].index
-                out_row_idx = chunk[chunk.iloc[:,0].astype(str).str.strip().str.lower()=="out time"].index
-                if not date_row_idx.empty and not in_row_idx.empty and not out_row_idx.empty:
-                    date_row_i = date_row_idx[0]
-                    in_row_i = in_row_idx[0]
-                    out_row_i = out_row_idx[0]
-                    # columns in chunk start at 0 -> corresponds to original_sheet_df columns at same offsets
-                    for date_val, times in changes.items():
-                        # locate which column in chunk has this date string
-                        cols = [c for c in chunk.columns if str(chunk.iloc[date_row_i, c]).strip() == str(date_val).strip()]
-                        if cols:
-                            col = cols[0]
-                            orig_col = col  # same column index relative to sheet
-                            # write back into original_sheet_df at appropriate row indices
-                            orig_row_in = start + in_row_i
-                            orig_row_out = start + out_row_i
-                            original_sheet_df.iat[orig_row_in, orig_col] = times["In Time"]
-                            original_sheet_df.iat[orig_row_out, orig_col] = times["Out Time"]
-                else:
-                    # fallback: try to match by first three rows as date,in,out pattern
-                    for date_val, times in changes.items():
-                        # find column by matching date in the first 10 columns
-                        for col in chunk.columns[:20]:
-                            if str(chunk.iloc[0, col]).strip() == str(date_val).strip():
-                                orig_row_in = start + 1
-                                orig_row_out = start + 2
-                                original_sheet_df.iat[orig_row_in, col] = times["In Time"]
-                                original_sheet_df.iat[orig_row_out, col] = times["Out Time"]
-            except Exception as e:
-                print("Warning while applying edits:", e)
+            # label rows and date -> column lookup were indexed when the file was loaded
+            in_row_i = emp["rows"]["in time"]
+            out_row_i = emp["rows"]["out time"]
+            for date_val, times in changes.items():
+                col = emp["dates"].get(str(date_val).strip())
+                if col is None:
+                    print("Warning while applying edits: date not found:", date_val)
+                    continue
+                put(emp, in_row_i, col, times["In Time"])
+                put(emp, out_row_i, col, times["Out Time"])
+        # the shared parsed blocks no longer match the file until it is written back
+        if edited_data:
+            workbook_cache.invalidate(file_path)
 
     def save_edits_and_close():
+        # month parameters are asked for up front; the write-back and processing then run in the background
+        params = ask_month_params()
+        if params is None:
+            return
         if edited_data:
             apply_edits_to_original()
-            # write back the modified original_sheet_df to the same file
-            try:
-                with pd.ExcelWriter(file_path, engine="openpyxl") as writer:
-                    # original_sheet_df may have NaN types; write as headerless to preserve layout
-                    original_sheet_df.to_excel(writer, index=False, header=False)
-                messagebox.showinfo("Saved", "Edits saved to the source Excel file.")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to save edits back to file:\n{e}")
-        # After saving edits, process the file and display results in main window
         navigation_window.destroy()
-        results = process_excel(file_path)
-        if results:
-            display_results(results)
-        else:
-            messagebox.showinfo("Info", "Processing finished but no results were generated.")
+
+        def work(progress):
+            save_error = None
+            if cell_edits:
+                # patch only the edited In/Out cells in place; formatting and other sheets are kept
+                try:
+                    patch_cells(file_path, cell_edits)
+                    workbook_cache.store_blocks(file_path, employee_chunks)
+                except Exception as e:
+                    save_error = e
+                else:
+                    # the edited workbook has new content: its month cache is the old one with the edited rows rewritten
+                    try:
+                        month_store.save_edits(file_path, employee_chunks, set(edited_data),
+                                               progress=lambda done: progress(done, len(employee_chunks)))
+                    except OSError:
+                        pass  # next load parses the workbook again
+            # only the edited employees are recomputed when this file was processed before
+            return process_excel(file_path, params, changed=set(edited_data), progress=progress), save_error
+
+        def done(outcome):
+            results, save_error = outcome
+            if save_error is not None:
+                messagebox.showerror("Error", f"Failed to save edits back to file:\n{save_error}")
+            elif cell_edits:
+                messagebox.showinfo("Saved", "Edits saved to the source Excel file.")
+            # After saving edits, display results in main window
+            if results:
+                display_results(results)
+            else:
+                messagebox.showinfo("Info", "Processing finished but no results were generated.")
+
+        run_in_background("Processing payroll", work, done, "An error occurred while processing the file")
 
     def next_employee():
         if current_index["idx"] < len(employee_chunks) - 1:
@@ -225,134 +321,38 @@ def display_navigation_window(employee_chunks, file_path, original_sheet_df):
     show_employee(0)
 
 # ---------- Processing Excel ----------
-def process_excel(file_path):
+def ask_month_params():
+    # (calc_method, days_in_month, num_sundays, num_holidays), or None if the user cancelled
+    calc_method = simpledialog.askstring("Calculation Method", "Choose calculation method:\nType '1' for In/Out Time or '2' for Total Working Hours", parent=root)
+    if calc_method not in ("1", "2"):
+        messagebox.showerror("Error", "Invalid calculation method. Please type '1' or '2'.")
+        return None
+    days_in_month = simpledialog.askinteger("Days in month", "Enter total days in the month:", parent=root, minvalue=1, maxvalue=31)
+    if days_in_month is None:
+        return None
+    num_sundays = simpledialog.askinteger("Sundays", "Enter number of Sundays in month:", parent=root, minvalue=0, maxvalue=10)
+    if num_sundays is None:
+        return None
+    num_holidays = simpledialog.askinteger("Company holidays", "Enter number of company holidays:", parent=root, minvalue=0, maxvalue=10)
+    if num_holidays is None:
+        return None
+    return (calc_method, days_in_month, num_sundays, num_holidays)
+
+def process_excel(file_path, params, changed=None, progress=None):
     """
-    Reads the Excel file and computes total hours and salary.
+    Reads the Excel file and computes total hours and salary for params from ask_month_params().
+    If results for the same file and month parameters are cached, only the employee indices in
+    `changed` are recomputed and merged into them; changed=None forces a full run.
+    With a service configured, runs without edited employees are sent to it.
+    Safe to call off the Tk thread: errors are raised, progress(done, total) is reported per batch.
     Returns a list of dicts: [{"Employee Name":..., "Total Monthly Hours":..., "Calculated Salary":...}, ...]
     """
-    try:
-        calc_method = simpledialog.askstring("Calculation Method", "Choose calculation method:\nType '1' for In/Out Time or '2' for Total Working Hours", parent=root)
-        if calc_method not in ("1", "2"):
-            messagebox.showerror("Error", "Invalid calculation method. Please type '1' or '2'.")
-            return []
-        days_in_month = simpledialog.askinteger("Days in month", "Enter total days in the month:", parent=root, minvalue=1, maxvalue=31)
-        if days_in_month is None:
-            return []
-        num_sundays = simpledialog.askinteger("Sundays", "Enter number of Sundays in month:", parent=root, minvalue=0, maxvalue=10)
-        if num_sundays is None:
-            return []
-        num_holidays = simpledialog.askinteger("Company holidays", "Enter number of company holidays:", parent=root, minvalue=0, maxvalue=10)
-        if num_holidays is None:
-            return []
-        hours_per_day = timedelta(hours=9, minutes=30)
-        actual_working_days = days_in_month - (num_sundays + num_holidays)
-
-        # read raw sheet
-        raw = pd.read_excel(file_path, header=None, engine="openpyxl")
-        chunk_size = 23
-        start_row = 2
-        results = []
-
-        for i in range(start_row, len(raw), chunk_size):
-            end_row = min(i + 22, len(raw))
-            chunk = raw.iloc[i:end_row].copy().reset_index(drop=True)
-            try:
-                emp_name = str(chunk.iloc[0, 0]).strip()
-            except Exception:
-                emp_name = f"Employee_{i}"
-
-            total_working_hours = 0.0
-
-            if calc_method == '1':
-                # Parse In Time and Out Time rows
-                in_rows = chunk[chunk.iloc[:,0].astype(str).str.strip().str.lower()=="in time"]
-                out_rows = chunk[chunk.iloc[:,0].astype(str).str.strip().str.lower()=="out time"]
-                if not in_rows.empty and not out_rows.empty:
-                    in_row = in_rows.iloc[0, 1:].dropna()
-                    out_row = out_rows.iloc[0, 1:].dropna()
-                    total_seconds = 0.0
-                    for in_val, out_val in zip(in_row, out_row):
-                        try:
-                            # accept various formats: H:M, H:M:S, maybe datetime objects
-                            if pd.isna(in_val) or pd.isna(out_val) or str(in_val).strip() in ("", "00:00", "0") or str(out_val).strip() in ("", "00:00", "0"):
-                                continue
-                            in_dt = pd.to_datetime(str(in_val), errors='coerce')
-                            out_dt = pd.to_datetime(str(out_val), errors='coerce')
-                            if pd.isna(in_dt) or pd.isna(out_dt):
-                                continue
-                            delta = (out_dt - in_dt).total_seconds()
-                            if delta > 0:
-                                total_seconds += delta
-                        except Exception:
-                            continue
-                    total_working_hours = total_seconds / 3600.0
-                else:
-                    # fallback: try "Total Working Hours" row
-                    trow = chunk[chunk.iloc[:,0].astype(str).str.strip().str.lower()=="total working hours"]
-                    if not trow.empty:
-                        try:
-                            total_data = trow.iloc[0,1:].dropna().astype(str)
-                            # try parse strings like '8:30' into hours
-                            seconds = 0.0
-                            for v in total_data:
-                                try:
-                                    td = pd.to_timedelta(v)
-                                    seconds += td.total_seconds()
-                                except Exception:
-                                    # try H:M format
-                                    try:
-                                        parts = str(v).split(":")
-                                        h = float(parts[0]); m = float(parts[1]) if len(parts)>1 else 0
-                                        seconds += (h*3600 + m*60)
-                                    except Exception:
-                                        continue
-                            total_working_hours = seconds / 3600.0
-                        except Exception:
-                            total_working_hours = 0.0
-            else:
-                # calc_method == '2'
-                trow = chunk[chunk.iloc[:,0].astype(str).str.strip().str.lower()=="total working hours"]
-                if not trow.empty:
-                    total_data = trow.iloc[0,1:].dropna().astype(str)
-                    seconds = 0.0
-                    for v in total_data:
-                        try:
-                            td = pd.to_timedelta(v)
-                            seconds += td.total_seconds()
-                        except Exception:
-                            try:
-                                parts = str(v).split(":"); h = float(parts[0]); m = float(parts[1]) if len(parts)>1 else 0
-                                seconds += (h*3600 + m*60)
-                            except Exception:
-                                continue
-                    total_working_hours = seconds / 3600.0
-                else:
-                    total_working_hours = 0.0
-
-            # add weekend & holiday hours
-            total_time_weekoff = (num_sundays * hours_per_day) + (num_holidays * hours_per_day)
-            total_working_hours += total_time_weekoff.total_seconds() / 3600.0
-
-            # compute salary if known
-            if emp_name in employee_details:
-                try:
-                    hourly_rate = float(employee_details[emp_name].get("Hourly Salary", 0))
-                except Exception:
-                    hourly_rate = 0.0
-                calc_salary = total_working_hours * hourly_rate
-            else:
-                hourly_rate = 0.0
-                calc_salary = 0.0
-
-            results.append({
-                "Employee Name": emp_name,
-                "Total Monthly Hours": total_working_hours,
-                "Calculated Salary": calc_salary
-            })
-        return results
-    except Exception as e:
-        messagebox.showerror("Error", f"An error occurred while processing the file:\n{e}")
-        return []
+    if service_url and not changed:
+        try:
+            return service_client.payroll(service_url, file_path, params)
+        except OSError:
+            pass  # service not reachable or busy: compute here
+    return run_payroll(file_path, params, get_employee_details(), changed, progress)
 
 # ---------- Save / Print functions ----------
 def save_details(results, option):
@@ -362,58 +362,92 @@ def save_details(results, option):
     save_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF Files", "*.pdf"), ("Excel Files", "*.xlsx")])
     if not save_path:
         return
+    is_pdf = save_path.lower().endswith(".pdf")
+    if is_pdf and not reportlab_available():
+        return
+
+    def done(_):
+        messagebox.showinfo("Saved", f"Saved {'PDF' if is_pdf else 'Excel'} to {save_path}")
+
+    run_in_background("Saving results", lambda progress: export_results(results, save_path, option, progress), done, "Failed to save file")
+
+def save_payslips(results, option):
+    # one PDF payslip per employee into a chosen folder, written by a process pool
+    if not results:
+        messagebox.showinfo("Info", "No results to save.")
+        return
+    if not reportlab_available():
+        return
+    out_dir = filedialog.askdirectory(title="Folder for payslips")
+    if not out_dir:
+        return
+
+    def work(progress):
+        total = len(results)
+        return export_stream.write_payslips(iter(results), out_dir, option, progress=lambda done: progress(done, total))
+
+    def done(count):
+        messagebox.showinfo("Saved", f"Saved {count} payslips to {out_dir}")
+
+    run_in_background("Saving payslips", work, done, "Failed to save payslips")
+
+def reportlab_available():
     try:
-        if save_path.lower().endswith(".pdf"):
-            # generate a simple PDF using reportlab if available
-            try:
-                from reportlab.lib.pagesizes import letter
-                from reportlab.pdfgen import canvas
-            except Exception:
-                messagebox.showerror("Error", "Reportlab not installed. Install with: pip install reportlab")
-                return
-            c = canvas.Canvas(save_path, pagesize=letter)
-            c.setFont("Helvetica", 12)
-            w, h = letter
-            margin = 50
-            y = h - margin
-            line_h = 18
-            for r in results:
-                if y < margin + line_h*4:
-                    c.showPage(); c.setFont("Helvetica", 12); y = h - margin
-                c.drawString(margin, y, f"Employee: {r['Employee Name']}")
-                y -= line_h
-                c.drawString(margin+10, y, f"Total Monthly Hours: {r['Total Monthly Hours']:.2f}")
-                y -= line_h
-                c.drawString(margin+10, y, f"Calculated Salary: {r['Calculated Salary']:.2f}")
-                y -= line_h*2
-            c.save()
-            messagebox.showinfo("Saved", f"Saved PDF to {save_path}")
-        else:
-            # save to Excel
-            df = pd.DataFrame(results)
-            df.to_excel(save_path, index=False)
-            messagebox.showinfo("Saved", f"Saved Excel to {save_path}")
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to save file: {e}")
+        import reportlab  # noqa: F401
+    except Exception:
+        messagebox.showerror("Error", "Reportlab not installed. Install with: pip install reportlab")
+        return False
+    return True
+
+def export_results(results, save_path, title="Salary Record", progress=None):
+    # writes results as a PDF table or Excel (by extension), streaming rows; runs on a background worker
+    report = progress or (lambda done, total: None)
+    total = len(results)
+    report(0, total)
+    export_stream.export(iter(results), save_path, title, progress=lambda done: report(done, total))
+    report(total, total)
 
 def print_details(results, option):
     # placeholder — real printing would use OS-specific calls or generate PDF then send to printer
     messagebox.showinfo("Print", "Print functionality sent (placeholder). You can save as PDF then print.")
 
+# ---------- Profiling ----------
+def toggle_profiling():
+    # stage timings and peak memory from now on; starting again clears the previous numbers
+    if profiling_var.get():
+        profiler.enable()
+    else:
+        profiler.disable()
+
+def save_profile_report():
+    if not profiler.stats():
+        messagebox.showinfo("Info", "No stage timings recorded yet. Enable Profiling > Record Stage Timings and run a payroll first.")
+        return
+    path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text Report", "*.txt"), ("JSON", "*.json")])
+    if not path:
+        return
+    try:
+        profiler.dump(path)
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to save profile report:\n{e}")
+        return
+    messagebox.showinfo("Saved", f"Profile report saved to {path}")
+
 # ---------- UI: main window and helpers ----------
 def display_results(results):
-    # clear tree view
-    for r in result_tree.get_children():
-        result_tree.delete(r)
-    for item in results:
-        result_tree.insert("", "end", values=(item["Employee Name"], f"{item['Total Monthly Hours']:.2f}", f"{item['Calculated Salary']:.2f}"))
+    # the table only materialises the rows on screen; sorting/filtering work on these tuples
+    with profiler.stage("display_results", rows=len(results)):
+        result_table.set_rows((item["Employee Name"], item["Total Monthly Hours"], item["Calculated Salary"],
+                               *(item.get(c) for c in SHIFT_COLUMNS)) for item in results)
     # enable save/print buttons
     save_btn.config(state=tk.NORMAL)
+    payslip_btn.config(state=tk.NORMAL)
     print_btn.config(state=tk.NORMAL)
     # store last results globally for saving
     root.last_results = results
 
 def add_or_edit_employee_details(employee_name=None):
+    employee_details = get_employee_details()
     def on_save():
         name = name_var.get().strip()
         hourly = hourly_var.get().strip()
@@ -423,12 +457,13 @@ def add_or_edit_employee_details(employee_name=None):
             messagebox.showwarning("Warning", "All fields are required.")
             return
         try:
-            employee_details[name] = {"Hourly Salary": float(hourly), "Shift Start": shift_s, "Shift End": shift_e}
-            save_employee_details()
-            messagebox.showinfo("Saved", f"Details for {name} saved.")
-            win.destroy()
+            record = {"Hourly Salary": float(hourly), "Shift Start": shift_s, "Shift End": shift_e}
         except Exception:
             messagebox.showerror("Error", "Hourly salary must be a number.")
+            return
+        if save_employee_details(name, record):
+            messagebox.showinfo("Saved", f"Details for {name} saved.")
+            win.destroy()
     win = tk.Toplevel(root)
     win.title("Add/Edit Employee")
     tk.Label(win, text="Employee Name").pack(pady=4)
@@ -447,50 +482,89 @@ def add_or_edit_employee_details(employee_name=None):
     tk.Button(win, text="Save", command=on_save).pack(pady=10)
 
 def view_employee_details():
+    employee_details = get_employee_details()
     win = tk.Toplevel(root)
     win.title("View Employee Details")
     win.geometry("600x400")
     columns = ("Employee Name", "Hourly Salary", "Shift Start", "Shift End")
-    tree = ttk.Treeview(win, columns=columns, show="headings")
-    for c in columns:
-        tree.heading(c, text=c)
-    tree.pack(fill=tk.BOTH, expand=True)
-    for name, d in employee_details.items():
-        tree.insert("", "end", values=(name, d.get("Hourly Salary",""), d.get("Shift Start",""), d.get("Shift End","")))
+    table = VirtualTable(win, columns)
+    table.pack(fill=tk.BOTH, expand=True)
+    table.set_rows((name, d.get("Hourly Salary",""), d.get("Shift Start",""), d.get("Shift End","")) for name, d in employee_details.items())
     def edit_selected():
-        sel = tree.selection()
-        if not sel:
+        row = table.selected_row()
+        if not row:
             return
-        name = tree.item(sel[0], "values")[0]
+        name = row[0]
         add_or_edit_employee_details(name)
         win.destroy()
     tk.Button(win, text="Edit Selected", command=edit_selected).pack(pady=6)
 
-# ---------- Main Tkinter setup ----------
-root = tk.Tk()
-root.title("TimeTrack Pro")
-root.geometry("800x700")
-
-tk.Label(root, text="Welcome to TimeTrack Pro", font=("Arial", 20), fg="blue").pack(pady=10)
-
-tk.Button(root, text="Upload Excel File", font=("Arial", 14), command=upload_file).pack(pady=8)
-tk.Button(root, text="Enter Employee Details", font=("Arial", 14), command=add_or_edit_employee_details).pack(pady=8)
-tk.Button(root, text="View/Edit Employee Details", font=("Arial", 14), command=view_employee_details).pack(pady=8)
-
-columns = ("Employee Name", "Total Monthly Hours", "Calculated Salary")
-result_tree = ttk.Treeview(root, columns=columns, show="headings", height=18)
-for col in columns:
-    result_tree.heading(col, text=col)
-result_tree.column("Employee Name", width=300)
-result_tree.column("Total Monthly Hours", width=150)
-result_tree.column("Calculated Salary", width=150)
-result_tree.pack(fill=tk.BOTH, expand=True, pady=10)
-
-bottom_frame = tk.Frame(root)
-bottom_frame.pack(fill=tk.X, pady=6)
-save_btn = tk.Button(bottom_frame, text="Save Results", font=("Arial", 12), state=tk.DISABLED, command=lambda: save_details(getattr(root,'last_results',[]), "Salary Record"))
-save_btn.pack(side=tk.LEFT, padx=10)
-print_btn = tk.Button(bottom_frame, text="Print Results", font=("Arial", 12), state=tk.DISABLED, command=lambda: print_details(getattr(root,'last_results',[]), "Salary Record"))
-print_btn.pack(side=tk.LEFT, padx=10)
-
-root.mainloop()
+# ---------- Entry point ----------
+def main(argv=None):
+    """GUI by default; "batch ..." runs the command-line batch mode, "serve ..." the payroll service. Returns the exit code."""
+    global root, result_table, save_btn, payslip_btn, print_btn, profiling_var
+    global tk, filedialog, messagebox, simpledialog, ttk, VirtualTable
+    argv, profile_path, use_cprofile = profiler.split_args(sys.argv[1:] if argv is None else argv)
+    if profile_path:
+        profiler.enable(cprofile=use_cprofile)
+    if argv[:1] == ["serve"]:
+        import payroll_service
+        return payroll_service.main(argv[1:], get_employee_details())
+    if argv[:1] == ["batch"]:
+        try:
+            return batch_cli.main(argv, get_employee_details())
+        finally:
+            if profile_path:
+                print(f"Profile report -> {profiler.dump(profile_path)}")
+
+    # ---------- Main Tkinter setup ----------
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, simpledialog, ttk
+    from virtual_table import VirtualTable
+    root = tk.Tk()
+    root.title("TimeTrack Pro")
+    root.geometry("1100x700")
+
+    menubar = tk.Menu(root)
+    profile_menu = tk.Menu(menubar, tearoff=0)
+    profiling_var = tk.BooleanVar(value=profiler.enabled)
+    profile_menu.add_checkbutton(label="Record Stage Timings", variable=profiling_var, command=toggle_profiling)
+    profile_menu.add_command(label="Save Profile Report...", command=save_profile_report)
+    menubar.add_cascade(label="Profiling", menu=profile_menu)
+    root.config(menu=menubar)
+
+    tk.Label(root, text="Welcome to TimeTrack Pro", font=("Arial", 20), fg="blue").pack(pady=10)
+
+    tk.Button(root, text="Upload Excel File", font=("Arial", 14), command=upload_file).pack(pady=8)
+    tk.Button(root, text="Upload Punch Log (CSV)", font=("Arial", 14), command=upload_punch_log).pack(pady=8)
+    tk.Button(root, text="Enter Employee Details", font=("Arial", 14), command=add_or_edit_employee_details).pack(pady=8)
+    tk.Button(root, text="View/Edit Employee Details", font=("Arial", 14), command=view_employee_details).pack(pady=8)
+
+    columns = ("Employee Name", "Total Monthly Hours", "Calculated Salary") + SHIFT_COLUMNS
+    two_dp = "{:.2f}".format
+    # shift figures are blank for employees without a Shift Start / Shift End on record
+    whole = lambda v: "" if v is None else f"{v:.0f}"
+    result_table = VirtualTable(root, columns, formatters={1: two_dp, 2: two_dp, 3: whole, 4: whole, 5: whole, 6: whole}, height=18)
+    result_table.column("Employee Name", width=220)
+    result_table.column("Total Monthly Hours", width=130)
+    result_table.column("Calculated Salary", width=130)
+    for c in SHIFT_COLUMNS:
+        result_table.column(c, width=110)
+    result_table.pack(fill=tk.BOTH, expand=True, pady=10)
+
+    bottom_frame = tk.Frame(root)
+    bottom_frame.pack(fill=tk.X, pady=6)
+    save_btn = tk.Button(bottom_frame, text="Save Results", font=("Arial", 12), state=tk.DISABLED, command=lambda: save_details(getattr(root,'last_results',[]), "Salary Record"))
+    save_btn.pack(side=tk.LEFT, padx=10)
+    payslip_btn = tk.Button(bottom_frame, text="Save Payslips", font=("Arial", 12), state=tk.DISABLED, command=lambda: save_payslips(getattr(root,'last_results',[]), "Salary Record"))
+    payslip_btn.pack(side=tk.LEFT, padx=10)
+    print_btn = tk.Button(bottom_frame, text="Print Results", font=("Arial", 12), state=tk.DISABLED, command=lambda: print_details(getattr(root,'last_results',[]), "Salary Record"))
+    print_btn.pack(side=tk.LEFT, padx=10)
+
+    root.mainloop()
+    if profile_path:
+        profiler.dump(profile_path)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# virtual_table.py
+# Paged ttk.Treeview for large row lists: only the rows currently on screen exist as Treeview items.
+
+import tkinter as tk
+from tkinter import ttk
+
+def _sort_key(v):
+    # numbers before text before blanks, so mixed columns still sort
+    if v is None or v == "":
+        return (2, "")
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return (0, v)
+    return (1, str(v).lower())
+
+class VirtualTable(tk.Frame):
+    """
+    Table widget backed by a plain list of row tuples.
+    Sorting (click a heading) and the filter box work on that list; the Treeview only ever holds
+    one screenful of items, which are refilled as the user scrolls.
+    """
+
+    def __init__(self, master, columns, formatters=None, filter_column=0, height=18, **kw):
+        super().__init__(master, **kw)
+        self.columns = tuple(columns)
+        self.formatters = formatters or {}  # column index -> callable(value) -> display string
+        self.filter_column = filter_column
+        self.rows = []
+        self.view = []          # indices into rows after filter + sort
+        self.top = 0            # position in view of the first row on screen
+        self.page = height      # rows that fit on screen
+        self.selected = None    # index into rows of the selected row
+        self.sort_col = None
+        self.sort_desc = False
+        self.filter_text = ""
+
+        bar = tk.Frame(self)
+        bar.pack(fill=tk.X)
+        tk.Label(bar, text=f"Filter by {self.columns[filter_column]}:").pack(side=tk.LEFT, padx=4)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *_: self.set_filter(self.filter_var.get()))
+        tk.Entry(bar, textvariable=self.filter_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=4)
+        self.count_label = tk.Label(bar, text="")
+        self.count_label.pack(side=tk.RIGHT, padx=4)
+
+        body = tk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(body, columns=self.columns, show="headings", height=height, selectmode="browse")
+        for i, c in enumerate(self.columns):
+            self.tree.heading(c, text=c, command=lambda i=i: self.sort_by(i))
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.page) or "break")
+        self.tree.bind("<Next>", lambda e: self.scroll(self.page) or "break")
+        self.tree.bind("<ButtonRelease-1>", self._on_click)
+
+    # ----- data -----
+    def column(self, name, **kw):
+        self.tree.column(name, **kw)
+
+    def set_rows(self, rows):
+        self.rows = list(rows)
+        self.selected = None
+        self._rebuild(keep_top=False)
+
+    def set_filter(self, text):
+        self.filter_text = text.strip().lower()
+        self._rebuild(keep_top=False)
+
+    def sort_by(self, col):
+        # clicking the same heading again reverses the order
+        self.sort_desc = (not self.sort_desc) if self.sort_col == col else False
+        self.sort_col = col
+        self._rebuild(keep_top=False)
+
+    def selected_row(self):
+        return self.rows[self.selected] if self.selected is not None else None
+
+    def _rebuild(self, keep_top=True):
+        idx = range(len(self.rows))
+        if self.filter_text:
+            fc = self.filter_column
+            idx = [i for i in idx if self.filter_text in str(self.rows[i][fc]).lower()]
+        if self.sort_col is not None:
+            sc = self.sort_col
+            idx = sorted(idx, key=lambda i: _sort_key(self.rows[i][sc]), reverse=self.sort_desc)
+        self.view = list(idx)
+        if not keep_top:
+            self.top = 0
+        self.count_label.config(text=f"{len(self.view)} of {len(self.rows)} rows")
+        self._render()
+
+    # ----- viewport -----
+    def scroll(self, delta):
+        self._scroll_to(self.top + delta)
+
+    def _scroll_to(self, top):
+        top = max(0, min(int(top), len(self.view) - self.page))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _render(self):
+        self.top = max(0, min(self.top, len(self.view) - self.page))
+        visible = self.view[self.top:self.top + self.page]
+        items = self.tree.get_children()
+        # reuse the existing items; only add/remove the difference when the page size changes
+        for extra in items[len(visible):]:
+            self.tree.delete(extra)
+        for slot in range(len(items), len(visible)):
+            self.tree.insert("", "end", iid=str(slot))
+        sel_slot = None
+        for slot, i in enumerate(visible):
+            row = self.rows[i]
+            values = [self.formatters[c](v) if c in self.formatters else v for c, v in enumerate(row)]
+            self.tree.item(str(slot), values=values)
+            if i == self.selected:
+                sel_slot = str(slot)
+        if sel_slot is not None:
+            self.tree.selection_set(sel_slot)
+        else:
+            self.tree.selection_remove(self.tree.selection())
+        n = len(self.view)
+        self.scrollbar.set(*((self.top / n, min(1.0, (self.top + self.page) / n)) if n else (0.0, 1.0)))
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._scroll_to(float(amount) * len(self.view))
+        elif action == "scroll":
+            self.scroll(int(amount) * (self.page if unit == "pages" else 1))
+
+    def _on_resize(self, event):
+        style = ttk.Style()
+        row_h = int(style.lookup("Treeview", "rowheight") or 20)
+        page = max(1, (event.height - 25) // row_h)
+        if page != self.page:
+            self.page = page
+            self._render()
+
+    def _on_click(self, event):
+        # items are reused page slots, so remember the underlying row rather than the item
+        slot = self.tree.identify_row(event.y)
+        if slot and self.top + int(slot) < len(self.view):
+            self.selected = self.view[self.top + int(slot)]
+
+    def _move_selection(self, step):
+        # arrow keys move through the whole list, scrolling the page when leaving it
+        if not self.view:
+            return "break"
+        pos = self.view.index(self.selected) if self.selected in self.view else self.top - step
+        pos = max(0, min(pos + step, len(self.view) - 1))
+        self.selected = self.view[pos]
+        if pos < self.top:
+            self.top = pos
+        elif pos >= self.top + self.page:
+            self.top = pos - self.page + 1
+        self._render()
+        self.tree.focus(str(pos - self.top))
+        return "break"
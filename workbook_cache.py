@@ -0,0 +1,97 @@
+# workbook_cache.py
+# Parsed-workbook cache shared by the navigation window, the edit write-back and the payroll run.
+# Requirements: numpy, openpyxl
+
+import os
+import threading
+from collections import OrderedDict
+
+import month_store
+import profiler
+from workbook_stream import iter_employee_blocks
+
+MAX_ENTRIES = 4  # parsed workbooks kept in memory, least recently used evicted first
+
+_entries = OrderedDict()  # abs path -> (mtime_ns, size, list of employee blocks)
+_results = {}  # abs path -> (month params, shift key, per-employee results aligned with the blocks)
+_lock = threading.Lock()
+
+def _stat_key(file_path):
+    st = os.stat(file_path)
+    return os.path.abspath(file_path), st.st_mtime_ns, st.st_size
+
+def peek_blocks(file_path):
+    # cached employee blocks of file_path if they still match the file on disk, else None
+    path, mtime, size = _stat_key(file_path)
+    with _lock:
+        hit = _entries.get(path)
+        if hit is not None and hit[0] == mtime and hit[1] == size:
+            _entries.move_to_end(path)
+            return hit[2]
+    return None
+
+def load_blocks(file_path, progress=None):
+    """
+    Returns the employee blocks of file_path (see workbook_stream.iter_employee_blocks).
+    The file is only parsed again when its mtime or size changed since the last call; a parse is
+    written to the on-disk month cache (month_store), so later sessions open that instead.
+    progress(done), if given, is called with the blocks parsed so far while parsing.
+    """
+    blocks = peek_blocks(file_path)
+    if blocks is not None:
+        return blocks
+    with profiler.stage("load_workbook") as st:
+        blocks = month_store.load_blocks(file_path)
+        if blocks is None:
+            try:
+                month_store.build(file_path, progress=progress)
+                blocks = month_store.load_blocks(file_path)
+            except OSError:
+                # cache directory not writable: keep this parse in memory only
+                blocks = []
+                for block in iter_employee_blocks(file_path):
+                    blocks.append(block)
+                    if progress and len(blocks) % month_store.PROGRESS_EVERY == 0:
+                        progress(len(blocks))
+        st.add(rows=len(blocks))
+    replace_blocks(file_path, blocks)
+    return blocks
+
+def replace_blocks(file_path, blocks):
+    # register freshly loaded blocks of file_path; results computed from an older version no longer line up
+    with _lock:
+        _results.pop(os.path.abspath(file_path), None)
+    store_blocks(file_path, blocks)
+
+def store_blocks(file_path, blocks):
+    # register in-memory blocks as the parsed form of file_path as it is on disk now
+    path, mtime, size = _stat_key(file_path)
+    with _lock:
+        _entries[path] = (mtime, size, blocks)
+        _entries.move_to_end(path)
+        while len(_entries) > MAX_ENTRIES:
+            evicted, _ = _entries.popitem(last=False)
+            _results.pop(evicted, None)
+
+def get_results(file_path, params):
+    # (results, shift key) last stored for file_path with the same month params, else None
+    with _lock:
+        hit = _results.get(os.path.abspath(file_path))
+    if hit is None or hit[0] != params:
+        return None
+    return hit[2], hit[1]
+
+def store_results(file_path, params, results, shifts=None):
+    # shifts: whatever identifies the employee shifts the results were computed with (see payroll_runner)
+    with _lock:
+        _results[os.path.abspath(file_path)] = (params, shifts, list(results))
+
+def invalidate(file_path):
+    # drops the parsed blocks only; stored results stay usable for an incremental recompute
+    with _lock:
+        _entries.pop(os.path.abspath(file_path), None)
+
+def clear():
+    with _lock:
+        _entries.clear()
+        _results.clear()
@@ -0,0 +1,289 @@
+# workbook_stream.py
+# Constant-memory reading of attendance workbooks (openpyxl read-only mode) and targeted cell write-back.
+# Requirements: numpy, openpyxl
+
+import os
+import re
+import tempfile
+import zipfile
+from collections import deque
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape as xml_escape
+
+import numpy as np
+
+import profiler
+from block_index import CHUNK_SIZE, LABELS, START_ROW, BlockIndexer, block_name
+
+def sheet_names(file_path):
+    from openpyxl import load_workbook
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+def estimate_blocks(file_path, sheet=0):
+    # employee count from the sheet's stored dimensions (for progress reporting), None if unknown
+    from openpyxl import load_workbook
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        ws = wb.worksheets[sheet] if isinstance(sheet, int) else wb[sheet]
+        max_row = ws.max_row
+    finally:
+        wb.close()
+    if not max_row or max_row <= START_ROW:
+        return None
+    return (max_row - START_ROW + CHUNK_SIZE - 1) // CHUNK_SIZE
+
+def iter_sheet_rows(file_path, sheet=0):
+    # one tuple of cell values per row of a sheet (index or name); rows are numbered the way pd.read_excel numbers them
+    from openpyxl import load_workbook
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet] if isinstance(sheet, int) else wb[sheet]
+        for row in ws.iter_rows(values_only=True):
+            yield row
+    finally:
+        wb.close()
+
+def make_block(rows, start_row, offsets):
+    # rows: cell tuples of the block; offsets: chunk row of each block_index.LABELS entry (-1 if absent)
+    width = max((len(r) for r in rows), default=1) or 1
+    chunk = np.full((len(rows), width), None, dtype=object)
+    for i, r in enumerate(rows):
+        chunk[i, :len(r)] = r
+    labels = {label: off for label, off in zip(LABELS, offsets) if off >= 0}
+    nav_rows, date_cols = _index_block(chunk, labels)
+    return {"name": block_name(chunk[0, 0], start_row), "chunk": chunk, "start_row": start_row,
+            "end_row": start_row + len(rows), "labels": labels, "rows": nav_rows, "dates": date_cols}
+
+def _index_block(chunk, labels):
+    """
+    Built once per block at load time: chunk rows the navigator shows as Date / In Time / Out Time and
+    {date string: chunk column}, so edits are located without scanning the chunk.
+    """
+    if all(k in labels for k in ("date", "in time", "out time")):
+        nav_rows = {k: labels[k] for k in ("date", "in time", "out time")}
+        cols = range(1, chunk.shape[1])
+    else:
+        # unlabeled layout: first three rows are date, in, out within the first 20 columns
+        nav_rows = {"date": 0, "in time": 1, "out time": 2}
+        cols = range(min(20, chunk.shape[1]))
+    date_row = nav_rows["date"]
+    date_cols = {}
+    if date_row < chunk.shape[0]:
+        for c in cols:
+            if chunk[date_row, c] is not None:
+                date_cols.setdefault(str(chunk[date_row, c]).strip(), c)
+    return nav_rows, date_cols
+
+def iter_employee_blocks(file_path, sheet=0):
+    """
+    Yields one employee block at a time: {"name", "chunk" (rows x cols object array), "start_row", "end_row",
+    "labels" (label -> chunk row), "rows"/"dates" (navigation lookups)}. Block boundaries come from
+    block_index.BlockIndexer; only the rows of the blocks being assembled are held in memory.
+    """
+    return blocks_from_rows(iter_sheet_rows(file_path, sheet))
+
+def blocks_from_rows(rows):
+    # same as iter_employee_blocks for any iterable of sheet row tuples (row 0 first)
+    indexer = BlockIndexer()
+    buffered = deque()  # (row, values) not yet handed out in a block
+    def take(start, end, offsets):
+        block_rows = [values for r, values in buffered if start <= r < end]
+        return make_block(block_rows, start, offsets)
+    for r, row in enumerate(rows):
+        if r < START_ROW:
+            continue
+        buffered.append((r, row))
+        for start, end, offsets in indexer.feed(r, row[0] if row else None):
+            yield take(start, end, offsets)
+        keep_from = indexer.first_pending_row
+        while buffered and (keep_from is None or buffered[0][0] < keep_from):
+            buffered.popleft()
+    for start, end, offsets in indexer.finish():
+        yield take(start, end, offsets)
+
+def patch_cells(file_path, cell_edits, sheet=0):
+    """
+    Overwrites only the cells in cell_edits ({(row, col): value}, 0-based like the DataFrame positions),
+    keeping formatting, formulas with their computed values and the other sheets; saved atomically.
+    """
+    with profiler.stage("write_back", cells=len(cell_edits)):
+        if not _patch_sheet_xml_in_zip(file_path, cell_edits, sheet):
+            _patch_cells_openpyxl(file_path, cell_edits, sheet)
+
+def _replace_atomically(file_path, write):
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(os.path.abspath(file_path)))
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def _patch_cells_openpyxl(file_path, cell_edits, sheet):
+    # fallback for sheet XML the in-zip patch does not handle; note that openpyxl drops the cached values
+    # of formulas, so data_only reads see None for them until the file is saved again in Excel
+    from openpyxl import load_workbook
+    wb = load_workbook(file_path)
+    ws = wb.worksheets[sheet] if isinstance(sheet, int) else wb[sheet]
+    for (r, c), v in cell_edits.items():
+        ws.cell(row=r + 1, column=c + 1, value=v)
+    _replace_atomically(file_path, wb.save)
+
+# ---------- In-zip sheet XML patch ----------
+# Only the edited <c> elements of the sheet part are rewritten; every other zip member and cell (formulas and
+# their cached <v> values included) is copied as is, so the cost is one pass over the sheet XML.
+
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_ROW = re.compile(rb'<row\b[^>]*?\sr="(\d+)"[^>]*?(/?)>')
+_CELL = re.compile(rb'<c\b[^>]*?\sr="([A-Z]+)\d+"[^>]*?(?:/>|>.*?</c>)', re.S)
+_STYLE = re.compile(rb'\ss="(\d+)"')
+_CALC_CHAIN = re.compile(rb'<(?:Override|Relationship)\b[^>]*calcChain[^>]*/>')
+_DIMENSION = re.compile(rb'(<dimension\b[^>]*?\sref=")([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"')
+
+def _sheet_part(zf, sheet):
+    # zip member name of a sheet (index or name), via xl/workbook.xml and its relationships
+    ns = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+    sheets = ElementTree.fromstring(zf.read("xl/workbook.xml")).iter(ns + "sheet")
+    entries = [(s.get("name"), s.get(_REL_NS + "id")) for s in sheets]
+    rid = entries[sheet][1] if isinstance(sheet, int) else dict(entries)[sheet]
+    rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    target = next(r.get("Target") for r in rels if r.get("Id") == rid)
+    return target.lstrip("/") if target.startswith("/") else "xl/" + target
+
+def _col_letters(col):
+    # 1-based column number -> "A", "B", ..., "AA"
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def _col_number(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+def _cell_xml(ref, value, style):
+    s = b' s="' + style + b'"' if style else b""
+    if value is None or value == "":
+        return b'<c r="' + ref + b'"' + s + b"/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return b'<c r="' + ref + b'"' + s + b"><v>" + repr(value).encode() + b"</v></c>"
+    text = xml_escape(str(value)).encode("utf-8")
+    return b'<c r="' + ref + b'"' + s + b' t="inlineStr"><is><t xml:space="preserve">' + text + b"</t></is></c>"
+
+def _patch_row(row_num, content, edits):
+    # content: the XML between <row ...> and </row>; returns (new content, whether a formula cell was replaced) or None
+    if _CELL.sub(b"", content).strip():
+        return None  # cells without a reference or other row children
+    cells = {_col_number(m.group(1).decode()): m.group(0) for m in _CELL.finditer(content)}
+    replaced_formula = False
+    for col, value in edits.items():
+        old = cells.get(col, b"")
+        style = _STYLE.search(old[:old.find(b">") + 1])
+        replaced_formula |= b"<f" in old
+        cells[col] = _cell_xml((_col_letters(col) + str(row_num)).encode(), value, style.group(1) if style else None)
+    return b"".join(cells[c] for c in sorted(cells)), replaced_formula
+
+def _patch_sheet(data, cell_edits):
+    # returns (patched sheet XML, whether a formula cell was replaced), or None for layouts left to openpyxl
+    by_row = {}
+    for (r, c), v in cell_edits.items():
+        by_row.setdefault(r + 1, {})[c + 1] = v
+    pending = sorted(by_row)
+    out, pos, rows_seen, replaced_formula = [], 0, 0, False
+    def new_row(n):
+        patched = _patch_row(n, b"", by_row[n])
+        return b'<row r="' + str(n).encode() + b'">' + patched[0] + b"</row>"
+    for m in _ROW.finditer(data):
+        rows_seen += 1
+        n = int(m.group(1))
+        while pending and pending[0] < n:
+            out += [data[pos:m.start()], new_row(pending.pop(0))]
+            pos = m.start()
+        if not pending or pending[0] != n:
+            continue
+        pending.pop(0)
+        if m.group(2):
+            end, content, tag = m.end(), b"", data[m.start():m.end() - 2].rstrip() + b">"
+        else:
+            end = data.index(b"</row>", m.end()) + len(b"</row>")
+            content, tag = data[m.end():end - len(b"</row>")], m.group(0)
+        patched = _patch_row(n, content, by_row[n])
+        if patched is None:
+            return None
+        replaced_formula |= patched[1]
+        out += [data[pos:m.start()], tag, patched[0], b"</row>"]
+        pos = end
+    if rows_seen != data.count(b"<row ") + data.count(b"<row>"):
+        return None  # rows without a number
+    tail = b"".join(new_row(n) for n in pending)
+    if tail:
+        close = data.find(b"</sheetData>", pos)
+        if close >= 0:
+            out += [data[pos:close], tail]
+            pos = close
+        elif b"<sheetData/>" in data[pos:]:
+            close = data.index(b"<sheetData/>", pos)
+            out += [data[pos:close], b"<sheetData>", tail, b"</sheetData>"]
+            pos = close + len(b"<sheetData/>")
+        else:
+            return None
+    out.append(data[pos:])
+    return _grow_dimension(b"".join(out), max(by_row), max(c for row in by_row.values() for c in row)), replaced_formula
+
+def _grow_dimension(data, max_row, max_col):
+    # read-only readers stop at the stored used range, so it has to cover cells added outside it
+    m = _DIMENSION.search(data)
+    if m is None:
+        return data
+    first_col, first_row = m.group(2).decode(), m.group(3).decode()
+    last_col, last_row = (m.group(4) or m.group(2)).decode(), int(m.group(5) or m.group(3))
+    if max_row <= last_row and max_col <= _col_number(last_col):
+        return data
+    ref = "%s%s:%s%d" % (first_col, first_row, _col_letters(max(max_col, _col_number(last_col))), max(max_row, last_row))
+    return data[:m.start()] + m.group(1) + ref.encode() + b'"' + data[m.end():]
+
+def _recalc_on_load(workbook_xml):
+    # formulas that read edited cells keep their old cached values; ask Excel to recalculate when opening
+    if b"fullCalcOnLoad" in workbook_xml:
+        return workbook_xml
+    if b"<calcPr" in workbook_xml:
+        return workbook_xml.replace(b"<calcPr", b'<calcPr fullCalcOnLoad="1"', 1)
+    # calcPr follows sheets / functionGroups / externalReferences / definedNames in the schema
+    ends = [workbook_xml.find(t) + len(t) for t in (b"</sheets>", b"</functionGroups>", b"</externalReferences>",
+                                                   b"</definedNames>", b"<definedNames/>", b"<definedNames />")
+            if t in workbook_xml]
+    if not ends:
+        return workbook_xml
+    at = max(ends)
+    return workbook_xml[:at] + b'<calcPr fullCalcOnLoad="1"/>' + workbook_xml[at:]
+
+def _patch_sheet_xml_in_zip(file_path, cell_edits, sheet):
+    # True once the file is replaced; False if the sheet's XML layout needs the openpyxl fallback
+    with zipfile.ZipFile(file_path) as zin:
+        part = _sheet_part(zin, sheet)
+        patched = _patch_sheet(zin.read(part), cell_edits)
+        if patched is None:
+            return False
+        sheet_xml, replaced_formula = patched
+        def write(tmp_path):
+            with zipfile.ZipFile(tmp_path, "w") as zout:
+                for info in zin.infolist():
+                    # a replaced formula cell would leave a stale calcChain entry; Excel rebuilds the chain
+                    if replaced_formula and info.filename == "xl/calcChain.xml":
+                        continue
+                    data = sheet_xml if info.filename == part else zin.read(info.filename)
+                    if info.filename == "xl/workbook.xml":
+                        data = _recalc_on_load(data)
+                    elif replaced_formula and info.filename in ("[Content_Types].xml", "xl/_rels/workbook.xml.rels"):
+                        data = _CALC_CHAIN.sub(b"", data)
+                    zout.writestr(info, data)
+        _replace_atomically(file_path, write)
+    return True